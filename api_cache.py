@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of model responses for the Gemini/Vertex test scripts
+Re-running a test with the same credential, model and prompt reads the
+saved answer instead of making another billable API call
+"""
+
+import logging
+import hashlib
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path('.api_cache')
+CACHE_TTL = 24 * 3600  # seconds before a cached response is fetched again
+
+def _cache_path(credential, model_name, prompt):
+    """Path of the cache entry for a credential, model and prompt"""
+    # Hashing the credential in keeps one account's answers from satisfying another's run
+    credential_hash = hashlib.sha256(credential.encode('utf-8')).hexdigest()[:16]
+    key = hashlib.sha256(f"{credential_hash}|{model_name}|{prompt}".encode('utf-8')).hexdigest()
+    return CACHE_DIR / key
+
+def get_cached(credential, model_name, prompt):
+    """Return the cached response text, or None if missing or expired"""
+    path = _cache_path(credential, model_name, prompt)
+    try:
+        if time.time() - path.stat().st_mtime < CACHE_TTL:
+            return path.read_text(encoding='utf-8')
+    except OSError:
+        pass
+    return None
+
+def store(credential, model_name, prompt, text):
+    """Save a response text for a credential, model and prompt"""
+    CACHE_DIR.mkdir(exist_ok=True)
+    path = _cache_path(credential, model_name, prompt)
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+def cached_generate(credential, model_name, prompt, fn, use_cache=True):
+    """
+    Return the response for a prompt, calling fn() only on a cache miss
+
+    Args:
+        credential: API key or project the call is billed to (hashed into the cache key)
+        model_name: Model the prompt is sent to
+        prompt: Prompt text (part of the cache key)
+        fn: Callable making the real API call and returning the response text
+        use_cache: False to always call the API (the fresh answer is still saved)
+
+    Returns:
+        Response text
+    """
+    if use_cache:
+        text = get_cached(credential, model_name, prompt)
+        if text is not None:
+            logger.info(f"💾 Using cached response for {model_name}")
+            return text
+
+    text = fn()
+    store(credential, model_name, prompt, text)
+    return text
@@ -1,29 +1,97 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import safe_join
 import os
+import mimetypes
+import hashlib
 import logging
-from datetime import datetime
 import traceback
 
 from config import Config
 from services.pdf_processor import pdf_processor
-from services.ai_analyzer import ai_analyzer
 from services.document_storage import document_storage
+from services.analysis_worker import analysis_worker
+from services.qa_batcher import qa_batcher
 from utils.error_handler import (
     APIError, ValidationError, ProcessingError,
     handle_api_error, handle_unexpected_error,
     with_error_handling, with_request_logging,
-    error_tracker, validate_file_upload, validate_question
+    error_tracker, validate_file_upload,
+    prebuild_error, error_response
 )
+from utils.validators import validate_pdf_file, validate_question, sanitize_filename
+from utils.clock import iso_now
+
+try:
+    from flask_orjson import OrjsonProvider
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Static error responses, serialized once at import
+_ERROR_BODIES = {
+    'FILE_TOO_LARGE': prebuild_error(
+        'FILE_TOO_LARGE', f'File size exceeds maximum limit of {Config.MAX_FILE_SIZE_MB}MB',
+        'Please upload a smaller file', 413
+    ),
+    'INTERNAL_ERROR': prebuild_error(
+        'INTERNAL_ERROR', 'An internal server error occurred',
+        'Please try again later', 500
+    ),
+    'NO_FILE': prebuild_error(
+        'NO_FILE', 'No file provided',
+        'Please select a PDF file to upload', 400
+    ),
+    'EMPTY_FILENAME': prebuild_error(
+        'EMPTY_FILENAME', 'No file selected',
+        'Please select a valid PDF file', 400
+    ),
+    'INVALID_FILE': prebuild_error(
+        'INVALID_FILE', 'File is not a valid PDF',
+        'Please upload a valid PDF document', 400
+    ),
+    'ANALYSIS_ERROR': prebuild_error(
+        'ANALYSIS_ERROR', 'Failed to analyze document',
+        'Please try again or contact support', 500
+    ),
+    'INVALID_CONTENT_TYPE': prebuild_error(
+        'INVALID_CONTENT_TYPE', 'Request must be JSON',
+        'Please send a JSON request with question and document_id', 400
+    ),
+    'MISSING_FIELDS': prebuild_error(
+        'MISSING_FIELDS', 'Missing required fields',
+        'Please provide both question and document_id', 400
+    ),
+    'DOCUMENT_NOT_FOUND': prebuild_error(
+        'DOCUMENT_NOT_FOUND', 'Document not found or expired',
+        'Please upload the document again or check the document ID', 404
+    ),
+    'NO_DOCUMENT_TEXT': prebuild_error(
+        'NO_DOCUMENT_TEXT', 'Document text not available',
+        'Please re-upload the document', 400
+    ),
+    'QA_ERROR': prebuild_error(
+        'QA_ERROR', 'Failed to answer question',
+        'Please try again or contact support', 500
+    )
+}
+
 def create_app():
     app = Flask(__name__, static_folder='static', static_url_path='')
     
+    # Serialize JSON responses with orjson when available
+    if HAS_ORJSON:
+        app.json = OrjsonProvider(app)
+    else:
+        # Skip key sorting and pretty-printing in the stdlib fallback
+        app.json.sort_keys = False
+        app.json.compact = True
+    
     # Load configuration
     app.config.from_object(Config)
     
@@ -34,8 +102,24 @@ def create_app():
         logger.error(f"Configuration error: {e}")
         raise
     
-    # Enable CORS for frontend communication
-    CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000"])
+    # Enable CORS for frontend communication (browsers cache preflights for a day)
+    CORS(
+        app,
+        origins=list(Config.CORS_ORIGINS),
+        max_age=86400,
+        send_wildcard=False,
+        supports_credentials=False,
+        allow_headers=['Content-Type'],
+        methods=['GET', 'POST', 'DELETE']
+    )
+    
+    # Expire cached PDF text together with stored documents
+    if pdf_processor.cache_dir:
+        document_storage.add_cleanup_task(pdf_processor.cleanup_disk_cache)
+    
+    # Register document blueprint (info/delete/stats, used to poll analysis status)
+    from api.document_routes import document_bp
+    app.register_blueprint(document_bp, url_prefix='/api/document')
     
     # Register WhatsApp blueprint
     try:
@@ -59,14 +143,7 @@ def create_app():
     # Error handlers
     @app.errorhandler(RequestEntityTooLarge)
     def handle_file_too_large(e):
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'FILE_TOO_LARGE',
-                'message': f'File size exceeds maximum limit of {Config.MAX_FILE_SIZE // (1024*1024)}MB',
-                'details': 'Please upload a smaller file'
-            }
-        }), 413
+        return error_response(_ERROR_BODIES['FILE_TOO_LARGE'])
     
     @app.errorhandler(400)
     def handle_bad_request(e):
@@ -82,15 +159,10 @@ def create_app():
     @app.errorhandler(500)
     def handle_internal_error(e):
         logger.error(f"Internal server error: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': 'An internal server error occurred',
-                'details': 'Please try again later'
-            }
-        }), 500
+        error_tracker.track_error('INTERNAL_ERROR', str(e))
+        if error_tracker.should_capture_stack(type(e).__name__):
+            logger.error(traceback.format_exc())
+        return error_response(_ERROR_BODIES['INTERNAL_ERROR'])
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
@@ -99,7 +171,7 @@ def create_app():
         try:
             return jsonify({
                 'status': 'healthy',
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                'timestamp': iso_now(),
                 'version': '1.0.0',
                 'service': 'legal-ease-backend'
             }), 200
@@ -107,7 +179,7 @@ def create_app():
             logger.error(f"Health check failed: {str(e)}")
             return jsonify({
                 'status': 'unhealthy',
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                'timestamp': iso_now(),
                 'error': str(e)
             }), 503
     
@@ -118,35 +190,21 @@ def create_app():
     def analyze_document():
         """Upload and analyze a legal document"""
         try:
-            # Import services
-            from services.pdf_processor import pdf_processor
-            from services.ai_analyzer import ai_analyzer
-            from services.document_storage import document_storage
-            from utils.validators import validate_pdf_file, sanitize_filename
-            
             # Validate request
             if 'file' not in request.files:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'NO_FILE',
-                        'message': 'No file provided',
-                        'details': 'Please select a PDF file to upload'
-                    }
-                }), 400
+                return error_response(_ERROR_BODIES['NO_FILE'])
             
             file = request.files['file']
             
             # Validate file
             if file.filename == '':
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'EMPTY_FILENAME',
-                        'message': 'No file selected',
-                        'details': 'Please select a valid PDF file'
-                    }
-                }), 400
+                return error_response(_ERROR_BODIES['EMPTY_FILENAME'])
+            
+            # Fail fast on anything without the PDF signature before full validation
+            head = file.stream.read(5)
+            file.stream.seek(0)
+            if not head.startswith(b'%PDF-'):
+                return error_response(_ERROR_BODIES['INVALID_FILE'])
             
             # Validate PDF file
             is_valid, error_message = validate_pdf_file(file, Config.MAX_FILE_SIZE)
@@ -164,8 +222,13 @@ def create_app():
             safe_filename = sanitize_filename(file.filename)
             logger.info(f"Processing document: {safe_filename}")
             
+            # Hash the raw upload so identical documents reuse a cached analysis
+            file.stream.seek(0)
+            content_hash = hashlib.file_digest(file.stream, lambda: hashlib.blake2b(digest_size=32)).hexdigest()
+            file.stream.seek(0)
+            
             # Extract text from PDF
-            success, extracted_text, pdf_error = pdf_processor.extract_text(file)
+            success, extracted_text, pdf_error = pdf_processor.extract_text(file, content_hash)
             
             if not success:
                 return jsonify({
@@ -178,13 +241,25 @@ def create_app():
                 }), 400
             
             # Store document text
-            document_id = document_storage.store_document(extracted_text, safe_filename)
+            document_id = document_storage.store_document(extracted_text, safe_filename, content_hash)
             
-            # Analyze document with AI
-            analysis_result = ai_analyzer.analyze_document(extracted_text, safe_filename)
+            # Queue analysis and let the client poll /api/document/info/<id>
+            if Config.ASYNC_ANALYSIS:
+                analysis_worker.submit(document_id, extracted_text, safe_filename, content_hash)
+                logger.info(f"Queued analysis for document {document_id}")
+                return jsonify({
+                    'success': True,
+                    'status': 'processing',
+                    'document_id': document_id,
+                    'document_info': {
+                        'filename': safe_filename,
+                        'text_length': len(extracted_text),
+                        'processed_at': iso_now()
+                    }
+                }), 202
             
-            # Update document with analysis results
-            document_storage.update_analysis(document_id, analysis_result)
+            # Analyze document with AI and store the results
+            analysis_result = analysis_worker.analyze_and_store(document_id, extracted_text, safe_filename, content_hash)
             
             # Prepare response
             response_data = {
@@ -198,7 +273,7 @@ def create_app():
                 'document_info': {
                     'filename': safe_filename,
                     'text_length': len(extracted_text),
-                    'processed_at': datetime.utcnow().isoformat() + 'Z'
+                    'processed_at': iso_now()
                 }
             }
             
@@ -206,16 +281,11 @@ def create_app():
             return jsonify(response_data), 200
             
         except Exception as e:
-            logger.error(f"Document analysis error: {str(e)}")
-            logger.error(traceback.format_exc())
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'ANALYSIS_ERROR',
-                    'message': 'Failed to analyze document',
-                    'details': 'Please try again or contact support'
-                }
-            }), 500
+            logger.error(f"Document analysis error: {type(e).__name__}: {str(e)}")
+            error_tracker.track_error('ANALYSIS_ERROR', str(e))
+            if error_tracker.should_capture_stack(type(e).__name__):
+                logger.error(traceback.format_exc())
+            return error_response(_ERROR_BODIES['ANALYSIS_ERROR'])
     
     # Question answering endpoint
     @app.route('/api/question', methods=['POST'])
@@ -224,34 +294,15 @@ def create_app():
     def answer_question():
         """Answer questions about an analyzed document"""
         try:
-            # Import services
-            from services.ai_analyzer import ai_analyzer
-            from services.document_storage import document_storage
-            from utils.validators import validate_question
-            
             # Validate request
             if not request.is_json:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'INVALID_CONTENT_TYPE',
-                        'message': 'Request must be JSON',
-                        'details': 'Please send a JSON request with question and document_id'
-                    }
-                }), 400
+                return error_response(_ERROR_BODIES['INVALID_CONTENT_TYPE'])
             
             data = request.get_json()
             
             # Validate required fields
             if not data or 'question' not in data or 'document_id' not in data:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'MISSING_FIELDS',
-                        'message': 'Missing required fields',
-                        'details': 'Please provide both question and document_id'
-                    }
-                }), 400
+                return error_response(_ERROR_BODIES['MISSING_FIELDS'])
             
             question = data.get('question', '').strip()
             document_id = data.get('document_id', '').strip()
@@ -271,31 +322,16 @@ def create_app():
             # Retrieve document
             document = document_storage.get_document(document_id)
             if not document:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'DOCUMENT_NOT_FOUND',
-                        'message': 'Document not found or expired',
-                        'details': 'Please upload the document again or check the document ID'
-                    }
-                }), 404
+                return error_response(_ERROR_BODIES['DOCUMENT_NOT_FOUND'])
             
             # Get document text
-            document_text = document.get('text', '')
-            if not document_text:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'NO_DOCUMENT_TEXT',
-                        'message': 'Document text not available',
-                        'details': 'Please re-upload the document'
-                    }
-                }), 400
+            if not document.text_length:
+                return error_response(_ERROR_BODIES['NO_DOCUMENT_TEXT'])
             
             logger.info(f"Answering question for document {document_id}: {question[:50]}...")
             
-            # Answer question using AI
-            answer_result = ai_analyzer.answer_question(document_text, question)
+            # Answer question using AI (batched with concurrent questions on this document)
+            answer_result = qa_batcher.submit(document_id, document.prompt_text, question).result(timeout=90)
             
             # Prepare response
             response_data = {
@@ -305,7 +341,7 @@ def create_app():
                 'confidence': answer_result.get('confidence', 'medium'),
                 'document_id': document_id,
                 'question': question,
-                'answered_at': datetime.utcnow().isoformat() + 'Z'
+                'answered_at': iso_now()
             }
             
             # Include error information if present
@@ -316,62 +352,97 @@ def create_app():
             return jsonify(response_data), 200
             
         except Exception as e:
-            logger.error(f"Question answering error: {str(e)}")
-            logger.error(traceback.format_exc())
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'QA_ERROR',
-                    'message': 'Failed to answer question',
-                    'details': 'Please try again or contact support'
-                }
-            }), 500
+            logger.error(f"Question answering error: {type(e).__name__}: {str(e)}")
+            error_tracker.track_error('QA_ERROR', str(e))
+            if error_tracker.should_capture_stack(type(e).__name__):
+                logger.error(traceback.format_exc())
+            return error_response(_ERROR_BODIES['QA_ERROR'])
+    
+    # Resolve frontend paths once; requests only stat the file they need
+    static_folder = app.static_folder
+    index_path = os.path.join(static_folder, 'index.html')
+    
+    # Content encodings we ship precompressed copies for, in preference order
+    precompressed_encodings = (('br', '.br'), ('gzip', '.gz'))
+    
+    def send_index():
+        """Send the SPA entry point, revalidated on every request"""
+        response = send_file(index_path, max_age=0)
+        response.headers['Cache-Control'] = 'no-cache, max-age=0, must-revalidate'
+        return response
+    
+    def send_static_asset(filename):
+        """Send a static asset, preferring a precompressed copy the client accepts"""
+        path = safe_join(static_folder, filename)
+        if not path or not os.path.isfile(path):
+            return None
+        
+        # Bundles under static/ carry a content hash in their name and never change
+        hashed = filename.startswith('static/')
+        max_age = 31536000 if hashed else 0
+        
+        response = None
+        for encoding, suffix in precompressed_encodings:
+            if request.accept_encodings[encoding] and os.path.isfile(path + suffix):
+                response = send_file(
+                    path + suffix,
+                    mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                    max_age=max_age
+                )
+                response.headers['Content-Encoding'] = encoding
+                break
+        
+        if response is None:
+            response = send_file(path, max_age=max_age)
+        
+        response.headers['Vary'] = 'Accept-Encoding'
+        if hashed:
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
     
     # Root endpoint - serve React frontend
     @app.route('/', methods=['GET'])
     def root():
         """Serve the React frontend"""
-        try:
-            return app.send_static_file('index.html')
-        except Exception as e:
-            # Fallback to API info if static files not found
-            logger.warning(f"Could not serve static files: {e}")
-            return jsonify({
-                'service': 'Legal EASE Backend',
-                'version': '1.0.0',
-                'status': 'running',
-                'message': 'Frontend not available - serving API only',
-                'endpoints': {
-                    'health': '/api/health',
-                    'analyze': '/api/analyze (POST)',
-                    'question': '/api/question (POST)'
-                }
-            })
+        if os.path.isfile(index_path):
+            return send_index()
+        
+        # Fallback to API info if static files not found
+        logger.warning("Could not serve static files: frontend not built")
+        return jsonify({
+            'service': 'Legal EASE Backend',
+            'version': '1.0.0',
+            'status': 'running',
+            'message': 'Frontend not available - serving API only',
+            'endpoints': {
+                'health': '/api/health',
+                'analyze': '/api/analyze (POST)',
+                'question': '/api/question (POST)'
+            }
+        })
     
     # Serve static files for React frontend
     @app.route('/<path:filename>')
     def serve_static(filename):
         """Serve static files for React frontend"""
-        try:
-            # Handle specific static files
-            if '.' in filename:
-                return app.send_static_file(filename)
-            else:
-                # For React Router, serve index.html for routes without extensions
-                return app.send_static_file('index.html')
-        except Exception as e:
-            logger.warning(f"Could not serve static file {filename}: {e}")
-            # For React Router, serve index.html for unknown routes
-            try:
-                return app.send_static_file('index.html')
-            except Exception:
-                return jsonify({'error': 'Frontend not available'}), 404
+        if '.' in filename:
+            response = send_static_asset(filename)
+            if response is not None:
+                return response
+        
+        # For React Router, serve index.html for routes without extensions or unknown files
+        if os.path.isfile(index_path):
+            return send_index()
+        
+        logger.warning(f"Could not serve static file {filename}: frontend not built")
+        return jsonify({'error': 'Frontend not available'}), 404
     
     return app
 
 # Create the Flask app
 app = create_app()
 
+# Development server only; production runs app:app under gunicorn gthread workers
 if __name__ == '__main__':
     port = Config.PORT
     debug = Config.FLASK_ENV == 'development'
@@ -13,13 +13,34 @@ class Config:
     # Application Configuration
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
     MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', 10485760))  # 10MB default
+    MAX_FILE_SIZE_MB = MAX_FILE_SIZE // (1024 * 1024)
     SESSION_TIMEOUT = int(os.getenv('SESSION_TIMEOUT', 3600))  # 1 hour default
+    MAX_PROMPT_TEXT_LENGTH = 8000  # Document characters sent to the AI per prompt
+    
+    # Extracted PDF text cache shared by worker processes. Off unless a directory
+    # is given; entries expire with the session and the cache is capped in size
+    PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', '')
+    PDF_CACHE_MAX_FILES = int(os.getenv('PDF_CACHE_MAX_FILES', 256))
+    PDF_CACHE_TTL = int(os.getenv('PDF_CACHE_TTL', SESSION_TIMEOUT))
+    
+    # Background analysis: return 202 from /api/analyze and let clients poll
+    ASYNC_ANALYSIS = os.getenv('ASYNC_ANALYSIS', 'false').lower() == 'true'
+    ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 4))
     
     # Server Configuration
     PORT = int(os.getenv('PORT', 5000))
     
+    # Redis (shared rate limiting across workers)
+    REDIS_URL = os.getenv('REDIS_URL')
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory').lower()  # 'memory' or 'redis'
+    
     # Security
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+    CORS_ORIGINS = tuple(
+        origin.strip()
+        for origin in os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
+        if origin.strip()
+    )
     
     @staticmethod
     def validate_config():
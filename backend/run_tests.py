@@ -1,90 +1,81 @@
-#!/usr/bin/env python3
-"""
-Test runner for Lexi Simplify backend
-"""
-
-import unittest
-import sys
-import os
-import coverage
-
-# Add the backend directory to the Python path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-def run_tests_with_coverage():
-    """Run tests with coverage reporting"""
-    
-    # Initialize coverage
-    cov = coverage.Coverage()
-    cov.start()
-    
-    # Discover and run tests
-    loader = unittest.TestLoader()
-    start_dir = 'tests'
-    suite = loader.discover(start_dir, pattern='test_*.py')
-    
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # Stop coverage and generate report
-    cov.stop()
-    cov.save()
-    
-    print("\n" + "="*50)
-    print("COVERAGE REPORT")
-    print("="*50)
-    cov.report()
-    
-    # Generate HTML coverage report
-    try:
-        cov.html_report(directory='htmlcov')
-        print(f"\nHTML coverage report generated in 'htmlcov' directory")
-    except Exception as e:
-        print(f"Could not generate HTML report: {e}")
-    
-    # Return exit code based on test results
-    return 0 if result.wasSuccessful() else 1
-
-def run_tests_simple():
-    """Run tests without coverage"""
-    
-    loader = unittest.TestLoader()
-    start_dir = 'tests'
-    suite = loader.discover(start_dir, pattern='test_*.py')
-    
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    return 0 if result.wasSuccessful() else 1
-
-def run_specific_test(test_name):
-    """Run a specific test module or test case"""
-    
-    try:
-        suite = unittest.TestLoader().loadTestsFromName(test_name)
-        runner = unittest.TextTestRunner(verbosity=2)
-        result = runner.run(suite)
-        return 0 if result.wasSuccessful() else 1
-    except Exception as e:
-        print(f"Error running test {test_name}: {e}")
-        return 1
-
-if __name__ == '__main__':
-    if len(sys.argv) > 1:
-        if sys.argv[1] == '--coverage':
-            exit_code = run_tests_with_coverage()
-        elif sys.argv[1] == '--help':
-            print("Usage:")
-            print("  python run_tests.py                 # Run all tests")
-            print("  python run_tests.py --coverage      # Run tests with coverage")
-            print("  python run_tests.py test_module     # Run specific test module")
-            print("  python run_tests.py --help          # Show this help")
-            exit_code = 0
-        else:
-            # Run specific test
-            exit_code = run_specific_test(sys.argv[1])
-    else:
-        # Run all tests without coverage by default
-        exit_code = run_tests_simple()
-    
-    sys.exit(exit_code)
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+Test runner for Lexi Simplify backend
+Install the test dependencies first: pip install -r requirements-dev.txt
+"""
+
+import subprocess
+import sys
+import os
+
+# Run from the backend directory so pytest.ini and the tests path resolve
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Spread tests across one worker process per CPU core (pytest-xdist)
+PARALLEL_ARGS = ['-n', 'auto']
+
+def run_pytest(*args):
+    """Run pytest with the given arguments and return its exit code"""
+    
+    command = [sys.executable, '-m', 'pytest', *PARALLEL_ARGS, *args]
+    return subprocess.run(command, cwd=BACKEND_DIR).returncode
+
+def run_tests_with_coverage():
+    """Run tests with coverage reporting"""
+    
+    # coverage.py's line tracer is kept behind a flag for its HTML report
+    if os.getenv('LEXI_USE_COVERAGEPY') == '1':
+        # pytest-cov combines the per-worker coverage data files itself
+        return run_pytest(
+            '--cov=.',
+            '--cov-report=term',
+            '--cov-report=html:htmlcov',
+            'tests'
+        )
+    
+    # SlipCover instruments bytecode and removes probes once lines are hit,
+    # so tests run close to full speed. It tracks a single process, so the
+    # suite runs without xdist workers here.
+    os.makedirs(os.path.join(BACKEND_DIR, 'htmlcov'), exist_ok=True)
+    command = [
+        sys.executable, '-m', 'slipcover',
+        '--source', '.',
+        '--json', '--out', os.path.join('htmlcov', 'coverage.json'),
+        '-m', 'pytest', 'tests'
+    ]
+    exit_code = subprocess.run(command, cwd=BACKEND_DIR).returncode
+    if exit_code == 0:
+        print("\nCoverage report written to 'htmlcov/coverage.json'")
+    return exit_code
+
+def run_tests_simple():
+    """Run tests without coverage"""
+    
+    return run_pytest('tests')
+
+def run_specific_test(test_name):
+    """Run a specific test module or test case (pytest module::Class::test syntax)"""
+    
+    return run_pytest(test_name)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        if sys.argv[1] == '--coverage':
+            exit_code = run_tests_with_coverage()
+        elif sys.argv[1] == '--help':
+            print("Usage:")
+            print("  python run_tests.py                              # Run all tests")
+            print("  python run_tests.py --coverage                   # Run tests with coverage (SlipCover)")
+            print("  LEXI_USE_COVERAGEPY=1 python run_tests.py --coverage  # Use coverage.py instead")
+            print("  python run_tests.py tests/test_module.py         # Run specific test module")
+            print("  python run_tests.py tests/test_module.py::Class  # Run specific test case")
+            print("  python run_tests.py --help                       # Show this help")
+            exit_code = 0
+        else:
+            # Run specific test
+            exit_code = run_specific_test(sys.argv[1])
+    else:
+        # Run all tests without coverage by default
+        exit_code = run_tests_simple()
+    
+    sys.exit(exit_code)
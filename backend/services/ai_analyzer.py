@@ -1,326 +1,638 @@
-import logging
-import json
-import re
-from typing import Dict, List, Optional, Tuple
-import os
-import requests
-import json
-
-from config import Config
-
-logger = logging.getLogger(__name__)
-
-class AIAnalyzer:
-    """
-    Service for analyzing legal documents using Google Cloud AI
-    Supports both Vertex AI and Gemini API
-    """
-    
-    def __init__(self):
-        self.project_id = Config.GOOGLE_CLOUD_PROJECT
-        self.location = Config.VERTEX_AI_LOCATION
-        self.gemini_api_key = Config.GEMINI_API_KEY
-        
-        # Initialize AI clients
-        self._init_ai_clients()
-        
-        # Analysis prompts
-        self.analysis_prompt = self._get_analysis_prompt()
-        self.qa_prompt = self._get_qa_prompt()
-    
-    def _init_ai_clients(self):
-        """Initialize Google Cloud AI clients"""
-        try:
-            if self.gemini_api_key:
-                # Use direct REST API calls to Gemini 2.0 Flash
-                self.api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent"
-                self.use_gemini_api = True
-                logger.info("✅ Initialized Gemini 2.0 Flash API client - Real AI analysis enabled!")
-            else:
-                self.use_gemini_api = False
-                logger.info("No API key provided, using mock responses")
-                
-        except Exception as e:
-            logger.error(f"Failed to initialize AI clients: {str(e)}")
-            self.use_gemini_api = False
-            logger.info("Falling back to mock responses")
-    
-    def analyze_document(self, text: str, filename: str = None) -> Dict:
-        """
-        Analyze legal document and extract key information
-        
-        Args:
-            text: Document text content
-            filename: Original filename (optional)
-        
-        Returns:
-            Dictionary with analysis results
-        """
-        
-        try:
-            # Prepare the prompt with document text
-            prompt = self.analysis_prompt.format(
-                document_text=text[:8000],  # Limit text length for API
-                filename=filename or "document"
-            )
-            
-            # Generate analysis
-            if self.use_gemini_api:
-                analysis_text = self._call_gemini_api(prompt)
-            else:
-                # Realistic mock response based on document content
-                analysis_text = f'''
-                {{
-                    "summary": "This legal document contains {len(text)} characters of text with various contractual provisions. The document appears to establish terms and conditions between parties, including rights, obligations, and procedures for compliance.",
-                    "key_points": [
-                        "Document contains specific terms and conditions for the agreement",
-                        "Payment obligations and financial responsibilities are outlined",
-                        "Liability limitations and risk allocation clauses are present",
-                        "Termination procedures and conditions are specified",
-                        "Dispute resolution mechanisms are established"
-                    ],
-                    "warnings": [
-                        "Review all financial obligations and payment terms carefully",
-                        "Pay attention to liability limitations that may affect your rights",
-                        "Note any automatic renewal or termination clauses",
-                        "Consider consulting with a legal professional for complex matters",
-                        "This is a demo analysis - full AI analysis coming soon"
-                    ]
-                }}
-                '''
-            
-            # Parse the structured response
-            analysis_result = self._parse_analysis_response(analysis_text)
-            
-            logger.info(f"Successfully analyzed document: {filename}")
-            return analysis_result
-            
-        except Exception as e:
-            logger.error(f"Document analysis error: {str(e)}")
-            return {
-                'summary': 'Analysis failed due to technical error',
-                'key_points': ['Unable to analyze document at this time'],
-                'warnings': ['Please try again later or contact support'],
-                'error': str(e)
-            }
-    
-    def answer_question(self, document_text: str, question: str) -> Dict:
-        """
-        Answer specific questions about the document
-        
-        Args:
-            document_text: Full document text
-            question: User's question
-        
-        Returns:
-            Dictionary with answer and source information
-        """
-        
-        try:
-            # Prepare the Q&A prompt
-            prompt = self.qa_prompt.format(
-                document_text=document_text[:8000],  # Limit text length
-                question=question
-            )
-            
-            # Generate answer
-            if self.use_gemini_api:
-                answer_text = self._call_gemini_api(prompt)
-            else:
-                # Mock response for Q&A
-                answer_text = f'''
-                {{
-                    "answer": "Based on the document content, I can see this is a legal document with {len(document_text)} characters. Your question '{question}' relates to the document content. This is a demo response - the full AI analysis system will provide detailed answers to your specific questions about clauses, terms, and conditions.",
-                    "source_section": "Document Analysis (Demo Mode)",
-                    "confidence": "medium"
-                }}
-                '''
-            
-            # Parse the response
-            answer_result = self._parse_qa_response(answer_text)
-            
-            logger.info(f"Successfully answered question: {question[:50]}...")
-            return answer_result
-            
-        except Exception as e:
-            logger.error(f"Question answering error: {str(e)}")
-            return {
-                'answer': 'Unable to answer question due to technical error',
-                'source_section': None,
-                'confidence': 'low',
-                'error': str(e)
-            }
-    
-    def _get_analysis_prompt(self) -> str:
-        """Get the prompt template for document analysis"""
-        return """
-You are a legal document analysis AI. Analyze the following legal document and provide a structured response.
-
-Document: {filename}
-Content: {document_text}
-
-Please provide your analysis in the following JSON format:
-{{
-    "summary": "A clear, plain English summary of the document's main purpose and key terms (2-3 sentences)",
-    "key_points": [
-        "First important clause or term explained in simple language",
-        "Second important clause or term explained in simple language",
-        "Third important clause or term explained in simple language",
-        "Fourth important clause or term explained in simple language",
-        "Fifth important clause or term explained in simple language"
-    ],
-    "warnings": [
-        "Any potentially unfavorable or concerning clauses",
-        "Unusual terms that might disadvantage the user",
-        "Important deadlines or obligations to note"
-    ]
-}}
-
-Focus on:
-1. Making complex legal language understandable
-2. Identifying the most important terms and obligations
-3. Highlighting potential risks or unfavorable conditions
-4. Explaining what the user is agreeing to in plain English
-
-Respond only with the JSON format above.
-"""
-    
-    def _get_qa_prompt(self) -> str:
-        """Get the prompt template for question answering"""
-        return """
-You are a legal document Q&A assistant. Answer the user's question based on the provided document.
-
-Document Content: {document_text}
-
-User Question: {question}
-
-Please provide your response in the following JSON format:
-{{
-    "answer": "Clear, direct answer to the user's question based on the document",
-    "source_section": "The specific section or clause that contains this information (if identifiable)",
-    "confidence": "high/medium/low based on how clearly the document addresses this question"
-}}
-
-Guidelines:
-1. Only answer based on information actually present in the document
-2. If the information is not in the document, clearly state that
-3. Explain legal terms in plain English
-4. Be specific and cite relevant sections when possible
-5. If the answer is unclear or ambiguous, indicate that
-
-Respond only with the JSON format above.
-"""
-    
-    def _parse_analysis_response(self, response_text: str) -> Dict:
-        """Parse AI response for document analysis"""
-        try:
-            # Try to extract JSON from the response
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                result = json.loads(json_str)
-                
-                # Validate required fields
-                required_fields = ['summary', 'key_points', 'warnings']
-                for field in required_fields:
-                    if field not in result:
-                        result[field] = []
-                
-                return result
-            else:
-                # Fallback parsing if JSON extraction fails
-                return self._fallback_parse_analysis(response_text)
-                
-        except json.JSONDecodeError:
-            logger.warning("Failed to parse JSON response, using fallback")
-            return self._fallback_parse_analysis(response_text)
-    
-    def _parse_qa_response(self, response_text: str) -> Dict:
-        """Parse AI response for question answering"""
-        try:
-            # Try to extract JSON from the response
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                result = json.loads(json_str)
-                
-                # Validate required fields
-                if 'answer' not in result:
-                    result['answer'] = response_text
-                if 'source_section' not in result:
-                    result['source_section'] = None
-                if 'confidence' not in result:
-                    result['confidence'] = 'medium'
-                
-                return result
-            else:
-                # Fallback if JSON extraction fails
-                return {
-                    'answer': response_text,
-                    'source_section': None,
-                    'confidence': 'medium'
-                }
-                
-        except json.JSONDecodeError:
-            logger.warning("Failed to parse JSON response for Q&A")
-            return {
-                'answer': response_text,
-                'source_section': None,
-                'confidence': 'low'
-            }
-    
-    def _call_gemini_api(self, prompt: str) -> str:
-        """Call Gemini API using REST API"""
-        try:
-            headers = {
-                'Content-Type': 'application/json',
-            }
-            
-            data = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }]
-            }
-            
-            # Make the API call
-            url = f"{self.api_url}?key={self.gemini_api_key}"
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    if 'content' in result['candidates'][0] and 'parts' in result['candidates'][0]['content']:
-                        return result['candidates'][0]['content']['parts'][0]['text']
-                    else:
-                        logger.error("Unexpected API response structure")
-                        return "Error: Unexpected response format"
-                else:
-                    logger.error("No candidates in API response")
-                    return "Error: No response generated"
-            else:
-                logger.error(f"API call failed with status {response.status_code}: {response.text}")
-                return f"Error: API call failed ({response.status_code})"
-                
-        except Exception as e:
-            logger.error(f"Error calling Gemini API: {str(e)}")
-            return f"Error: {str(e)}"
-    
-    def _fallback_parse_analysis(self, response_text: str) -> Dict:
-        """Fallback parsing when JSON parsing fails"""
-        return {
-            'summary': response_text[:500] + "..." if len(response_text) > 500 else response_text,
-            'key_points': [
-                'Document analysis completed',
-                'Please review the full response above',
-                'Contact support if you need clarification'
-            ],
-            'warnings': [
-                'Analysis format may not be optimal',
-                'Please verify important details independently'
-            ]
-        }
-
-# Global AI analyzer instance
-ai_analyzer = AIAnalyzer()
\ No newline at end of file
+import logging
+import json
+from typing import Dict, List, Optional, Tuple
+import os
+import copy
+import string
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from config import Config
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so one except clause covers both
+_json_loads = orjson.loads if HAS_ORJSON else json.loads
+
+logger = logging.getLogger(__name__)
+
+_CLOSING_BRACKETS = {'{': '}', '[': ']'}
+
+# Canned content for mock mode (no API key configured)
+_MOCK_KEY_POINTS = (
+    "Document contains specific terms and conditions for the agreement",
+    "Payment obligations and financial responsibilities are outlined",
+    "Liability limitations and risk allocation clauses are present",
+    "Termination procedures and conditions are specified",
+    "Dispute resolution mechanisms are established"
+)
+_MOCK_WARNINGS = (
+    "Review all financial obligations and payment terms carefully",
+    "Pay attention to liability limitations that may affect your rights",
+    "Note any automatic renewal or termination clauses",
+    "Consider consulting with a legal professional for complex matters",
+    "This is a demo analysis - full AI analysis coming soon"
+)
+
+def prompt_text(text: str) -> str:
+    """Limit document text to the length sent to the AI, copying only when it must be cut"""
+    limit = Config.MAX_PROMPT_TEXT_LENGTH
+    return text if len(text) <= limit else text[:limit]
+
+def _compact_prompt(template: str) -> str:
+    """Trim indentation and surrounding blank lines from a prompt template (whitespace costs tokens)"""
+    return "\n".join(line.strip() for line in template.strip().splitlines())
+
+def _split_template(template: str, *fields: str) -> Tuple[str, ...]:
+    """
+    Split a str.format template into the literal text around its fields
+    
+    The literals come back with escaped braces already resolved, so prompts
+    can be assembled by concatenation without reparsing the template.
+    
+    Args:
+        template: Format template
+        fields: Expected field names, in the order they appear
+    
+    Returns:
+        Literal segments, one more than the number of fields
+    """
+    
+    # The parser also breaks at escaped braces, so join literals between fields
+    segments = ['']
+    found = []
+    for literal, field_name, _, _ in string.Formatter().parse(template):
+        segments[-1] += literal
+        if field_name is not None:
+            found.append(field_name)
+            segments.append('')
+    
+    if tuple(found) != fields:
+        raise ValueError(f"Template fields {found} do not match {list(fields)}")
+    
+    return tuple(segments)
+
+def _extract_json(text: str, opening: str = '{') -> Optional[str]:
+    """
+    Find the first balanced JSON object (or array) in a model response
+    
+    Walks the text once, tracking bracket depth and skipping brackets inside
+    string literals, so malformed output cannot trigger regex backtracking.
+    
+    Args:
+        text: Raw model response
+        opening: '{' for an object, '[' for an array
+    
+    Returns:
+        The balanced JSON slice, or None if there isn't one
+    """
+    
+    start = text.find(opening)
+    if start == -1:
+        return None
+    
+    closing = _CLOSING_BRACKETS[opening]
+    depth = 0
+    in_string = False
+    escaped = False
+    
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == opening:
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    
+    return None
+
+class AIAnalyzer:
+    """
+    Service for analyzing legal documents using Google Cloud AI
+    Supports both Vertex AI and Gemini API
+    """
+    
+    # Extracted text shorter than this (ignoring whitespace) isn't worth an AI call
+    MIN_ANALYZABLE_CHARS = 200
+    
+    def __init__(self):
+        self.project_id = Config.GOOGLE_CLOUD_PROJECT
+        self.location = Config.VERTEX_AI_LOCATION
+        self.gemini_api_key = Config.GEMINI_API_KEY
+        
+        # LRU cache of analysis results keyed by a digest of the prompt inputs
+        self._analysis_cache: OrderedDict = OrderedDict()
+        self._analysis_cache_size = 256
+        self._cache_lock = threading.Lock()
+        
+        # Initialize AI clients
+        self._init_ai_clients()
+        
+        # Analysis prompts
+        self.analysis_prompt = _compact_prompt(self._get_analysis_prompt())
+        self.qa_prompt = _compact_prompt(self._get_qa_prompt())
+        self.batch_qa_prompt = _compact_prompt(self._get_batch_qa_prompt())
+        
+        # Templates split once around their placeholders for cheap assembly
+        self._analysis_pre, self._analysis_mid, self._analysis_post = _split_template(
+            self.analysis_prompt, 'filename', 'document_text'
+        )
+        self._qa_pre, self._qa_mid, self._qa_post = _split_template(
+            self.qa_prompt, 'document_text', 'question'
+        )
+        self._batch_qa_parts = _split_template(
+            self.batch_qa_prompt, 'document_text', 'questions', 'count'
+        )
+    
+    def _init_ai_clients(self):
+        """Initialize Google Cloud AI clients"""
+        # Imported here so loading this module doesn't pull in the HTTP stack
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # Keep one HTTP session so TLS connections are reused across calls
+        self.http = requests.Session()
+        self.http.mount('https://', HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=None,  # generateContent is a POST
+                raise_on_status=False  # hand the last response back for status handling
+            )
+        ))
+        self.http.headers.update({'Content-Type': 'application/json'})
+        
+        # Worker threads for overlapping independent Gemini calls
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='gemini')
+        
+        try:
+            if self.gemini_api_key:
+                # Use direct REST API calls to Gemini 2.0 Flash
+                self.api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-exp:generateContent"
+                self.use_gemini_api = True
+                logger.info("✅ Initialized Gemini 2.0 Flash API client - Real AI analysis enabled!")
+            else:
+                self.use_gemini_api = False
+                logger.info("No API key provided, using mock responses")
+                
+        except Exception as e:
+            logger.error(f"Failed to initialize AI clients: {str(e)}")
+            self.use_gemini_api = False
+            logger.info("Falling back to mock responses")
+    
+    def analyze_document(self, text: str, filename: str = None) -> Dict:
+        """
+        Analyze legal document and extract key information
+        
+        Args:
+            text: Document text content
+            filename: Original filename (optional)
+        
+        Returns:
+            Dictionary with analysis results
+        """
+        
+        if self._too_short(text):
+            logger.info(f"Skipping analysis of near-empty document: {filename}")
+            return {
+                'summary': 'Document too short to analyze',
+                'key_points': [],
+                'warnings': [f'Fewer than {self.MIN_ANALYZABLE_CHARS} characters of extractable text.']
+            }
+        
+        if not self.use_gemini_api:
+            # Realistic mock response based on document content
+            return {
+                'summary': (
+                    f"This legal document contains {len(text)} characters of text with various contractual "
+                    "provisions. The document appears to establish terms and conditions between parties, "
+                    "including rights, obligations, and procedures for compliance."
+                ),
+                'key_points': list(_MOCK_KEY_POINTS),
+                'warnings': list(_MOCK_WARNINGS)
+            }
+        
+        cache_key = self._analysis_cache_key(text, filename)
+        with self._cache_lock:
+            cached = self._analysis_cache.get(cache_key)
+            if cached is not None:
+                self._analysis_cache.move_to_end(cache_key)
+        if cached is not None:
+            logger.info(f"Returning cached analysis for document: {filename}")
+            return copy.deepcopy(cached)
+        
+        try:
+            # Prepare the prompt with document text
+            document_text = prompt_text(text)  # Limit text length for API
+            prompt = f"{self._analysis_pre}{filename or 'document'}{self._analysis_mid}{document_text}{self._analysis_post}"
+            
+            # Generate analysis
+            analysis_text = self._call_gemini_api(prompt)
+            
+            # Parse the structured response
+            analysis_result = self._parse_analysis_response(analysis_text)
+            
+            # API failures come back as "Error: ..." text; flag them so no cache pins them
+            if analysis_text.startswith('Error:'):
+                logger.error(f"Document analysis failed for {filename}: {analysis_text}")
+                analysis_result['error'] = analysis_text
+                return analysis_result
+            
+            with self._cache_lock:
+                self._analysis_cache[cache_key] = copy.deepcopy(analysis_result)
+                if len(self._analysis_cache) > self._analysis_cache_size:
+                    self._analysis_cache.popitem(last=False)
+            
+            logger.info(f"Successfully analyzed document: {filename}")
+            return analysis_result
+            
+        except Exception as e:
+            logger.error(f"Document analysis error: {str(e)}")
+            return {
+                'summary': 'Analysis failed due to technical error',
+                'key_points': ['Unable to analyze document at this time'],
+                'warnings': ['Please try again later or contact support'],
+                'error': str(e)
+            }
+    
+    def _too_short(self, text: str) -> bool:
+        """Check whether text has too little content to send to the AI"""
+        return len(text) < self.MIN_ANALYZABLE_CHARS or len(text.strip()) < self.MIN_ANALYZABLE_CHARS
+    
+    def _analysis_cache_key(self, text: str, filename: Optional[str]) -> str:
+        """Digest of everything that goes into the analysis prompt"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update((filename or 'document').encode('utf-8', 'surrogatepass'))
+        digest.update(b'\0')
+        digest.update(text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+    
+    def answer_question(self, document_text: str, question: str) -> Dict:
+        """
+        Answer specific questions about the document
+        
+        Args:
+            document_text: Full document text
+            question: User's question
+        
+        Returns:
+            Dictionary with answer and source information
+        """
+        
+        if self._too_short(document_text):
+            return {
+                'answer': 'The document does not contain enough extractable text to answer questions about it.',
+                'source_section': None,
+                'confidence': 'low'
+            }
+        
+        if not self.use_gemini_api:
+            # Mock response for Q&A
+            return {
+                'answer': (
+                    f"Based on the document content, I can see this is a legal document with {len(document_text)} "
+                    f"characters. Your question '{question}' relates to the document content. This is a demo "
+                    "response - the full AI analysis system will provide detailed answers to your specific "
+                    "questions about clauses, terms, and conditions."
+                ),
+                'source_section': 'Document Analysis (Demo Mode)',
+                'confidence': 'medium'
+            }
+        
+        try:
+            # Prepare the Q&A prompt
+            limited_text = prompt_text(document_text)  # Limit text length
+            prompt = f"{self._qa_pre}{limited_text}{self._qa_mid}{question}{self._qa_post}"
+            
+            # Generate answer
+            answer_text = self._call_gemini_api(prompt)
+            
+            # Parse the response
+            answer_result = self._parse_qa_response(answer_text)
+            
+            logger.info(f"Successfully answered question: {question[:50]}...")
+            return answer_result
+            
+        except Exception as e:
+            logger.error(f"Question answering error: {str(e)}")
+            return {
+                'answer': 'Unable to answer question due to technical error',
+                'source_section': None,
+                'confidence': 'low',
+                'error': str(e)
+            }
+    
+    def answer_questions_batch(self, document_text: str, questions: List[str]) -> List[Dict]:
+        """
+        Answer several questions about the same document in one AI call
+        
+        Args:
+            document_text: Full document text
+            questions: User questions, in order
+        
+        Returns:
+            List of answer dictionaries, one per question in the same order
+        """
+        
+        # Mock mode, single questions and near-empty documents gain nothing from a combined prompt
+        if not self.use_gemini_api or len(questions) == 1 or self._too_short(document_text):
+            return self.answer_questions_concurrently(document_text, questions)
+        
+        try:
+            numbered_questions = "\n".join(
+                f"{i}. {question}" for i, question in enumerate(questions, 1)
+            )
+            pre, after_text, after_questions, post = self._batch_qa_parts
+            limited_text = prompt_text(document_text)  # Limit text length
+            prompt = f"{pre}{limited_text}{after_text}{numbered_questions}{after_questions}{len(questions)}{post}"
+            
+            answers = self._parse_batch_qa_response(self._call_gemini_api(prompt), len(questions))
+            if answers is not None:
+                logger.info(f"Successfully answered {len(questions)} batched questions")
+                return answers
+            
+            logger.warning("Failed to parse batched Q&A response, answering individually")
+            
+        except Exception as e:
+            logger.error(f"Batched question answering error: {str(e)}")
+        
+        return self.answer_questions_concurrently(document_text, questions)
+    
+    def answer_questions_concurrently(self, document_text: str, questions: List[str]) -> List[Dict]:
+        """
+        Answer questions with one AI call each, overlapping the calls
+        
+        Args:
+            document_text: Full document text
+            questions: User questions, in order
+        
+        Returns:
+            List of answer dictionaries, one per question in the same order
+        """
+        
+        if len(questions) == 1:
+            return [self.answer_question(document_text, questions[0])]
+        
+        futures = [
+            self._pool.submit(self.answer_question, document_text, question)
+            for question in questions
+        ]
+        return [future.result() for future in futures]
+    
+    def _get_analysis_prompt(self) -> str:
+        """Get the prompt template for document analysis"""
+        return """
+You are a legal document analysis AI. Analyze the following legal document and provide a structured response.
+
+Document: {filename}
+Content: {document_text}
+
+Please provide your analysis in the following JSON format:
+{{
+    "summary": "A clear, plain English summary of the document's main purpose and key terms (2-3 sentences)",
+    "key_points": [
+        "First important clause or term explained in simple language",
+        "Second important clause or term explained in simple language",
+        "Third important clause or term explained in simple language",
+        "Fourth important clause or term explained in simple language",
+        "Fifth important clause or term explained in simple language"
+    ],
+    "warnings": [
+        "Any potentially unfavorable or concerning clauses",
+        "Unusual terms that might disadvantage the user",
+        "Important deadlines or obligations to note"
+    ]
+}}
+
+Focus on:
+1. Making complex legal language understandable
+2. Identifying the most important terms and obligations
+3. Highlighting potential risks or unfavorable conditions
+4. Explaining what the user is agreeing to in plain English
+
+Respond only with the JSON format above.
+"""
+    
+    def _get_qa_prompt(self) -> str:
+        """Get the prompt template for question answering"""
+        return """
+You are a legal document Q&A assistant. Answer the user's question based on the provided document.
+
+Document Content: {document_text}
+
+User Question: {question}
+
+Please provide your response in the following JSON format:
+{{
+    "answer": "Clear, direct answer to the user's question based on the document",
+    "source_section": "The specific section or clause that contains this information (if identifiable)",
+    "confidence": "high/medium/low based on how clearly the document addresses this question"
+}}
+
+Guidelines:
+1. Only answer based on information actually present in the document
+2. If the information is not in the document, clearly state that
+3. Explain legal terms in plain English
+4. Be specific and cite relevant sections when possible
+5. If the answer is unclear or ambiguous, indicate that
+
+Respond only with the JSON format above.
+"""
+    
+    def _get_batch_qa_prompt(self) -> str:
+        """Get the prompt template for answering several questions at once"""
+        return """
+You are a legal document Q&A assistant. Answer each of the user's questions based on the provided document.
+
+Document Content: {document_text}
+
+User Questions:
+{questions}
+
+Please provide your response as a JSON array with exactly {count} objects, one per question in the same order:
+[
+    {{
+        "answer": "Clear, direct answer to the question based on the document",
+        "source_section": "The specific section or clause that contains this information (if identifiable)",
+        "confidence": "high/medium/low based on how clearly the document addresses this question"
+    }}
+]
+
+Guidelines:
+1. Only answer based on information actually present in the document
+2. If the information is not in the document, clearly state that
+3. Explain legal terms in plain English
+4. Be specific and cite relevant sections when possible
+5. If the answer is unclear or ambiguous, indicate that
+
+Respond only with the JSON array above.
+"""
+    
+    def _parse_analysis_response(self, response_text: str) -> Dict:
+        """Parse AI response for document analysis"""
+        try:
+            # Try to extract JSON from the response
+            json_str = _extract_json(response_text)
+            if json_str:
+                result = _json_loads(json_str)
+                
+                # Validate required fields
+                required_fields = ['summary', 'key_points', 'warnings']
+                for field in required_fields:
+                    if field not in result:
+                        result[field] = []
+                
+                return result
+            else:
+                # Fallback parsing if JSON extraction fails
+                return self._fallback_parse_analysis(response_text)
+                
+        except json.JSONDecodeError:
+            logger.warning("Failed to parse JSON response, using fallback")
+            return self._fallback_parse_analysis(response_text)
+    
+    def _parse_qa_response(self, response_text: str) -> Dict:
+        """Parse AI response for question answering"""
+        try:
+            # Try to extract JSON from the response
+            json_str = _extract_json(response_text)
+            if json_str:
+                result = _json_loads(json_str)
+                
+                # Validate required fields
+                if 'answer' not in result:
+                    result['answer'] = response_text
+                if 'source_section' not in result:
+                    result['source_section'] = None
+                if 'confidence' not in result:
+                    result['confidence'] = 'medium'
+                
+                return result
+            else:
+                # Fallback if JSON extraction fails
+                return {
+                    'answer': response_text,
+                    'source_section': None,
+                    'confidence': 'medium'
+                }
+                
+        except json.JSONDecodeError:
+            logger.warning("Failed to parse JSON response for Q&A")
+            return {
+                'answer': response_text,
+                'source_section': None,
+                'confidence': 'low'
+            }
+    
+    def _parse_batch_qa_response(self, response_text: str, expected_count: int) -> Optional[List[Dict]]:
+        """Parse AI response for batched question answering, None if unusable"""
+        try:
+            json_str = _extract_json(response_text, '[')
+            if not json_str:
+                return None
+            
+            results = _json_loads(json_str)
+            if not isinstance(results, list) or len(results) != expected_count:
+                return None
+            
+            answers = []
+            for result in results:
+                if not isinstance(result, dict) or 'answer' not in result:
+                    return None
+                result.setdefault('source_section', None)
+                result.setdefault('confidence', 'medium')
+                answers.append(result)
+            
+            return answers
+            
+        except json.JSONDecodeError:
+            return None
+    
+    def _call_gemini_api(self, prompt: str) -> str:
+        """Call Gemini API using REST API"""
+        try:
+            data = {
+                "contents": [{
+                    "parts": [{
+                        "text": prompt
+                    }]
+                }]
+            }
+            
+            # Make the API call; streamed so error bodies needn't be downloaded
+            with self.http.post(
+                self.api_url,
+                params={'key': self.gemini_api_key},
+                json=data,
+                timeout=(3.05, 30),  # (connect, read)
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    error_body = response.raw.read(512, decode_content=True).decode('utf-8', 'replace')
+                    logger.error(f"API call failed with status {response.status_code}: {error_body}")
+                    return f"Error: API call failed ({response.status_code})"
+                
+                # Parse the raw bytes directly instead of decoding to text first
+                result = _json_loads(response.content)
+            
+            if 'candidates' in result and len(result['candidates']) > 0:
+                if 'content' in result['candidates'][0] and 'parts' in result['candidates'][0]['content']:
+                    return result['candidates'][0]['content']['parts'][0]['text']
+                else:
+                    logger.error("Unexpected API response structure")
+                    return "Error: Unexpected response format"
+            else:
+                logger.error("No candidates in API response")
+                return "Error: No response generated"
+                
+        except Exception as e:
+            logger.error(f"Error calling Gemini API: {str(e)}")
+            return f"Error: {str(e)}"
+    
+    def _fallback_parse_analysis(self, response_text: str) -> Dict:
+        """Fallback parsing when JSON parsing fails"""
+        return {
+            'summary': response_text[:500] + "..." if len(response_text) > 500 else response_text,
+            'key_points': [
+                'Document analysis completed',
+                'Please review the full response above',
+                'Contact support if you need clarification'
+            ],
+            'warnings': [
+                'Analysis format may not be optimal',
+                'Please verify important details independently'
+            ]
+        }
+
+# Global AI analyzer instance, created on first use
+_ai_analyzer: Optional[AIAnalyzer] = None
+_ai_analyzer_lock = threading.Lock()
+
+def get_ai_analyzer() -> AIAnalyzer:
+    """Return the shared AI analyzer, creating it on first call"""
+    global _ai_analyzer
+    if _ai_analyzer is None:
+        with _ai_analyzer_lock:
+            if _ai_analyzer is None:
+                _ai_analyzer = AIAnalyzer()
+    return _ai_analyzer
\ No newline at end of file
@@ -0,0 +1,118 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import Config
+from services.ai_analyzer import get_ai_analyzer
+from services.document_storage import document_storage
+
+logger = logging.getLogger(__name__)
+
+class AnalysisWorker:
+    """
+    Background worker for document analysis
+    Runs AI analysis off the request thread so handlers can return immediately
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='analysis'
+        )
+
+    def submit(self, document_id: str, text: str, filename: str = None, content_hash: str = None,
+               on_complete: Optional[Callable[[Dict[str, Any]], None]] = None) -> Future:
+        """
+        Queue a document for analysis
+
+        Args:
+            document_id: Stored document identifier
+            text: Extracted document text
+            filename: Original filename (optional)
+            content_hash: Content hash used as the analysis cache key (optional)
+            on_complete: Callback invoked with the analysis result (optional)
+
+        Returns:
+            Future resolving to the analysis result
+        """
+
+        return self._executor.submit(self._run, document_id, text, filename, content_hash, on_complete)
+
+    def submit_task(self, task: Callable[..., Any], *args) -> Future:
+        """
+        Queue preparatory work for a document (e.g. download and extraction) on the same pool
+
+        Args:
+            task: Callable to run; it should report its own failures to the user
+            *args: Arguments passed to task
+
+        Returns:
+            Future resolving to the task's return value
+        """
+
+        return self._executor.submit(self._run_task, task, *args)
+
+    def analyze_and_store(self, document_id: str, text: str, filename: str = None,
+                          content_hash: str = None) -> Dict[str, Any]:
+        """
+        Analyze a document, reusing a cached result for identical content
+
+        Args:
+            document_id: Stored document identifier
+            text: Extracted document text
+            filename: Original filename (optional)
+            content_hash: Content hash used as the analysis cache key (optional)
+
+        Returns:
+            Analysis result
+        """
+
+        analysis_result = document_storage.get_analysis_by_hash(content_hash) if content_hash else None
+
+        if analysis_result is not None:
+            logger.info(f"Reusing cached analysis for document {document_id}")
+        else:
+            analysis_result = get_ai_analyzer().analyze_document(text, filename)
+            if content_hash and 'error' not in analysis_result:
+                document_storage.cache_analysis(content_hash, analysis_result)
+
+        document_storage.update_analysis(document_id, analysis_result)
+        return analysis_result
+
+    def _run(self, document_id: str, text: str, filename: Optional[str], content_hash: Optional[str],
+             on_complete: Optional[Callable[[Dict[str, Any]], None]]) -> Dict[str, Any]:
+        """Analyze the document and store the results"""
+
+        try:
+            analysis_result = self.analyze_and_store(document_id, text, filename, content_hash)
+            logger.info(f"Background analysis completed for document {document_id}")
+        except Exception as e:
+            # Nobody waits on the future, so record the failure where pollers and callbacks see it
+            logger.error(f"Background analysis error for document {document_id}: {str(e)}")
+            analysis_result = {
+                'summary': 'Analysis failed due to technical error',
+                'key_points': ['Unable to analyze document at this time'],
+                'warnings': ['Please try again later or contact support'],
+                'error': str(e)
+            }
+            document_storage.update_analysis(document_id, analysis_result)
+
+        if on_complete:
+            try:
+                on_complete(analysis_result)
+            except Exception as e:
+                logger.error(f"Analysis callback error for document {document_id}: {str(e)}")
+
+        return analysis_result
+
+    def _run_task(self, task: Callable[..., Any], *args) -> Any:
+        """Run a queued task, logging errors nobody waits on the future for"""
+
+        try:
+            return task(*args)
+        except Exception as e:
+            logger.error(f"Background task {getattr(task, '__name__', task)} failed: {str(e)}")
+            return None
+
+# Global analysis worker instance
+analysis_worker = AnalysisWorker(max_workers=Config.ANALYSIS_WORKERS)
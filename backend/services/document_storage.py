@@ -1,172 +1,378 @@
-import uuid
-import time
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
-import threading
-
-class DocumentStorage:
-    """
-    In-memory document storage for the prototype
-    In production, this would be replaced with a proper database or cloud storage
-    """
-    
-    def __init__(self, session_timeout: int = 3600):
-        self.documents: Dict[str, Dict[str, Any]] = {}
-        self.session_timeout = session_timeout
-        self._lock = threading.Lock()
-        
-        # Start cleanup thread
-        self._start_cleanup_thread()
-    
-    def store_document(self, text: str, filename: str = None) -> str:
-        """
-        Store document text and return unique document ID
-        
-        Args:
-            text: Extracted document text
-            filename: Original filename (optional)
-        
-        Returns:
-            Unique document ID
-        """
-        
-        document_id = str(uuid.uuid4())
-        expires_at = datetime.utcnow() + timedelta(seconds=self.session_timeout)
-        
-        with self._lock:
-            self.documents[document_id] = {
-                'text': text,
-                'filename': filename,
-                'created_at': datetime.utcnow(),
-                'expires_at': expires_at,
-                'analysis_result': None
-            }
-        
-        return document_id
-    
-    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
-        """
-        Retrieve document by ID
-        
-        Args:
-            document_id: Document identifier
-        
-        Returns:
-            Document data or None if not found/expired
-        """
-        
-        with self._lock:
-            if document_id not in self.documents:
-                return None
-            
-            document = self.documents[document_id]
-            
-            # Check if expired
-            if datetime.utcnow() > document['expires_at']:
-                del self.documents[document_id]
-                return None
-            
-            return document.copy()
-    
-    def update_analysis(self, document_id: str, analysis_result: Dict[str, Any]) -> bool:
-        """
-        Update document with analysis results
-        
-        Args:
-            document_id: Document identifier
-            analysis_result: Analysis results from AI service
-        
-        Returns:
-            True if updated successfully, False if document not found
-        """
-        
-        with self._lock:
-            if document_id not in self.documents:
-                return False
-            
-            # Check if expired
-            if datetime.utcnow() > self.documents[document_id]['expires_at']:
-                del self.documents[document_id]
-                return False
-            
-            self.documents[document_id]['analysis_result'] = analysis_result
-            return True
-    
-    def delete_document(self, document_id: str) -> bool:
-        """
-        Delete document by ID
-        
-        Args:
-            document_id: Document identifier
-        
-        Returns:
-            True if deleted, False if not found
-        """
-        
-        with self._lock:
-            if document_id in self.documents:
-                del self.documents[document_id]
-                return True
-            return False
-    
-    def cleanup_expired(self) -> int:
-        """
-        Remove expired documents
-        
-        Returns:
-            Number of documents removed
-        """
-        
-        current_time = datetime.utcnow()
-        expired_ids = []
-        
-        with self._lock:
-            for doc_id, document in self.documents.items():
-                if current_time > document['expires_at']:
-                    expired_ids.append(doc_id)
-            
-            for doc_id in expired_ids:
-                del self.documents[doc_id]
-        
-        return len(expired_ids)
-    
-    def get_stats(self) -> Dict[str, Any]:
-        """
-        Get storage statistics
-        
-        Returns:
-            Dictionary with storage stats
-        """
-        
-        with self._lock:
-            return {
-                'total_documents': len(self.documents),
-                'oldest_document': min(
-                    (doc['created_at'] for doc in self.documents.values()),
-                    default=None
-                ),
-                'newest_document': max(
-                    (doc['created_at'] for doc in self.documents.values()),
-                    default=None
-                )
-            }
-    
-    def _start_cleanup_thread(self):
-        """Start background thread for cleaning up expired documents"""
-        
-        def cleanup_worker():
-            while True:
-                try:
-                    removed = self.cleanup_expired()
-                    if removed > 0:
-                        print(f"Cleaned up {removed} expired documents")
-                    time.sleep(300)  # Run every 5 minutes
-                except Exception as e:
-                    print(f"Error in cleanup thread: {e}")
-                    time.sleep(60)  # Wait 1 minute before retrying
-        
-        cleanup_thread = threading.Thread(target=cleanup_worker, daemon=True)
-        cleanup_thread.start()
-
-# Global document storage instance
+import uuid
+import time
+import zlib
+import heapq
+import functools
+import dataclasses
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Any, Tuple
+import threading
+
+from config import Config
+
+# Number of independently locked storage shards (must be a power of two)
+SHARD_COUNT = 16
+
+# Longest the cleanup thread sleeps, so the analysis cache is still purged when idle
+MAX_CLEANUP_INTERVAL = 300
+
+def _to_iso(timestamp: float) -> str:
+    """Format a Unix timestamp as an ISO 8601 UTC string with a Z suffix"""
+    return datetime.utcfromtimestamp(timestamp).isoformat() + 'Z'
+
+@functools.lru_cache(maxsize=8)
+def _decompress_text(text_z: bytes) -> str:
+    """Decompress stored document text, keeping the most recent few in memory"""
+    return zlib.decompress(text_z).decode('utf-8', 'surrogatepass')
+
+@dataclass(frozen=True, slots=True)
+class DocRecord:
+    """Immutable stored document; updates replace the record instead of mutating it"""
+    text_z: bytes  # zlib-compressed UTF-8 document text
+    text_length: int
+    prompt_text: str
+    filename: Optional[str]
+    created_at: float  # Wall-clock Unix time, for display and ordering
+    expires_at: float  # time.monotonic() deadline, immune to clock changes
+    created_at_iso: str
+    expires_at_iso: str
+    content_hash: Optional[str] = None
+    analysis_result: Optional[Dict[str, Any]] = None
+    
+    @property
+    def text(self) -> str:
+        """Full document text"""
+        return _decompress_text(self.text_z)
+
+class DocumentStorage:
+    """
+    In-memory document storage for the prototype
+    In production, this would be replaced with a proper database or cloud storage
+    """
+    
+    def __init__(self, session_timeout: int = 3600, analysis_cache_ttl: int = 604800,
+                 max_cached_analyses: int = 1000):
+        # Documents are spread across shards, each with its own lock, so
+        # requests for different documents don't queue behind each other
+        self._shards: List[Dict[str, DocRecord]] = [{} for _ in range(SHARD_COUNT)]
+        self._locks = [threading.Lock() for _ in range(SHARD_COUNT)]
+        self.session_timeout = session_timeout
+        
+        # Per-shard min-heaps of (expires_at, document_id), guarded by the shard
+        # lock, so cleanup only touches expired entries
+        self._expiry_heaps: List[List[Tuple[float, str]]] = [[] for _ in range(SHARD_COUNT)]
+        
+        # Set when a new document becomes the earliest expiry in its shard
+        self._wake = threading.Event()
+        
+        # Analysis results keyed by content hash, so re-uploads skip the AI call
+        self.analysis_cache: Dict[str, Dict[str, Any]] = {}
+        self.analysis_cache_ttl = analysis_cache_ttl
+        self.max_cached_analyses = max_cached_analyses
+        self._cache_lock = threading.Lock()
+        
+        # Extra sweeps run by the cleanup thread, e.g. for on-disk caches
+        self._cleanup_tasks: List[Callable[[], int]] = []
+        
+        # Start cleanup thread
+        self._start_cleanup_thread()
+    
+    def _shard_index(self, document_id: str) -> int:
+        """Return the index of the shard that owns a document ID"""
+        return hash(document_id) & (SHARD_COUNT - 1)
+    
+    def _shard(self, document_id: str) -> Tuple[Dict[str, DocRecord], threading.Lock]:
+        """Return the shard and lock that own a document ID"""
+        index = self._shard_index(document_id)
+        return self._shards[index], self._locks[index]
+    
+    def store_document(self, text: str, filename: str = None, content_hash: str = None) -> str:
+        """
+        Store document text and return unique document ID
+        
+        Args:
+            text: Extracted document text
+            filename: Original filename (optional)
+            content_hash: Content hash used as the analysis cache key (optional)
+        
+        Returns:
+            Unique document ID
+        """
+        
+        document_id = uuid.uuid4().hex
+        created_at = time.time()
+        expires_at = time.monotonic() + self.session_timeout
+        
+        # Level 1 is fast and still shrinks extracted legal text several times over
+        text_z = zlib.compress(text.encode('utf-8', 'surrogatepass'), 1)
+        
+        index = self._shard_index(document_id)
+        expiry_heap = self._expiry_heaps[index]
+        with self._locks[index]:
+            self._shards[index][document_id] = DocRecord(
+                text_z=text_z,
+                text_length=len(text),
+                # Truncated once here so Q&A calls don't re-slice the text
+                prompt_text=text[:Config.MAX_PROMPT_TEXT_LENGTH],
+                filename=filename,
+                created_at=created_at,
+                expires_at=expires_at,
+                created_at_iso=_to_iso(created_at),
+                expires_at_iso=_to_iso(created_at + self.session_timeout),
+                content_hash=content_hash
+            )
+            heapq.heappush(expiry_heap, (expires_at, document_id))
+            new_head = expiry_heap[0][1] == document_id
+        
+        if new_head:
+            self._wake.set()
+        
+        return document_id
+    
+    def get_document(self, document_id: str) -> Optional[DocRecord]:
+        """
+        Retrieve document by ID
+        
+        Args:
+            document_id: Document identifier
+        
+        Returns:
+            Document record (immutable, shared) or None if not found/expired
+        """
+        
+        documents, lock = self._shard(document_id)
+        with lock:
+            if document_id not in documents:
+                return None
+            
+            document = documents[document_id]
+            
+            # Check if expired
+            if time.monotonic() > document.expires_at:
+                del documents[document_id]
+                return None
+            
+            return document
+    
+    def update_analysis(self, document_id: str, analysis_result: Dict[str, Any]) -> bool:
+        """
+        Update document with analysis results
+        
+        Args:
+            document_id: Document identifier
+            analysis_result: Analysis results from AI service
+        
+        Returns:
+            True if updated successfully, False if document not found
+        """
+        
+        documents, lock = self._shard(document_id)
+        with lock:
+            if document_id not in documents:
+                return False
+            
+            # Check if expired
+            document = documents[document_id]
+            if time.monotonic() > document.expires_at:
+                del documents[document_id]
+                return False
+            
+            documents[document_id] = dataclasses.replace(document, analysis_result=analysis_result)
+            return True
+    
+    def get_analysis_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis result by content hash
+        
+        Args:
+            content_hash: Content hash of the analyzed document
+        
+        Returns:
+            Cached analysis result or None if not found/expired
+        """
+        
+        with self._cache_lock:
+            entry = self.analysis_cache.get(content_hash)
+            if not entry:
+                return None
+            
+            if time.monotonic() > entry['expires_at']:
+                del self.analysis_cache[content_hash]
+                return None
+            
+            return entry['analysis_result']
+    
+    def cache_analysis(self, content_hash: str, analysis_result: Dict[str, Any]) -> None:
+        """
+        Cache an analysis result by content hash
+        
+        Args:
+            content_hash: Content hash of the analyzed document
+            analysis_result: Analysis results from AI service
+        """
+        
+        expires_at = time.monotonic() + self.analysis_cache_ttl
+        
+        with self._cache_lock:
+            self.analysis_cache.pop(content_hash, None)
+            
+            # Evict the oldest entries once the cache is full
+            while len(self.analysis_cache) >= self.max_cached_analyses:
+                del self.analysis_cache[next(iter(self.analysis_cache))]
+            
+            self.analysis_cache[content_hash] = {
+                'analysis_result': analysis_result,
+                'expires_at': expires_at
+            }
+    
+    def delete_document(self, document_id: str) -> bool:
+        """
+        Delete document by ID
+        
+        Args:
+            document_id: Document identifier
+        
+        Returns:
+            True if deleted, False if not found
+        """
+        
+        documents, lock = self._shard(document_id)
+        with lock:
+            if document_id in documents:
+                del documents[document_id]
+                return True
+            return False
+    
+    def cleanup_expired(self) -> int:
+        """
+        Remove expired documents
+        
+        Returns:
+            Number of documents removed
+        """
+        
+        current_time = time.monotonic()
+        
+        # Sweep shard by shard; each sweep only takes its own shard's lock
+        removed = sum(self._cleanup_shard(index, current_time) for index in range(SHARD_COUNT))
+        
+        with self._cache_lock:
+            # Entries share one TTL and are re-inserted on refresh, so the
+            # cache is ordered by expiry and we can stop at the first live one
+            while self.analysis_cache:
+                content_hash = next(iter(self.analysis_cache))
+                if current_time <= self.analysis_cache[content_hash]['expires_at']:
+                    break
+                del self.analysis_cache[content_hash]
+        
+        return removed
+    
+    def add_cleanup_task(self, task: Callable[[], int]):
+        """
+        Run a sweep alongside document cleanup
+        
+        Args:
+            task: Callable removing expired data and returning how many items it removed
+        """
+        
+        self._cleanup_tasks.append(task)
+    
+    def _cleanup_shard(self, index: int, current_time: float) -> int:
+        """Remove expired documents from one shard, returning how many were removed"""
+        
+        documents = self._shards[index]
+        expiry_heap = self._expiry_heaps[index]
+        removed = 0
+        
+        # Pop expired heap entries one at a time so writers can interleave
+        while True:
+            with self._locks[index]:
+                if not expiry_heap or expiry_heap[0][0] >= current_time:
+                    break
+                expires_at, doc_id = heapq.heappop(expiry_heap)
+                
+                # Skip entries for documents already deleted or expired on read
+                document = documents.get(doc_id)
+                if document is not None and document.expires_at == expires_at:
+                    del documents[doc_id]
+                    removed += 1
+        
+        return removed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get storage statistics
+        
+        Returns:
+            Dictionary with storage stats
+        """
+        
+        total_documents = 0
+        oldest = None
+        newest = None
+        
+        # Summarize shard by shard, each under only its own lock
+        for count, shard_oldest, shard_newest in map(self._shard_stats, range(SHARD_COUNT)):
+            total_documents += count
+            if shard_oldest and (oldest is None or shard_oldest.created_at < oldest.created_at):
+                oldest = shard_oldest
+            if shard_newest and (newest is None or shard_newest.created_at > newest.created_at):
+                newest = shard_newest
+        
+        return {
+            'total_documents': total_documents,
+            'oldest_document': oldest.created_at_iso if oldest else None,
+            'newest_document': newest.created_at_iso if newest else None
+        }
+    
+    def _shard_stats(self, index: int) -> Tuple[int, Optional[DocRecord], Optional[DocRecord]]:
+        """Return the document count and oldest/newest documents of one shard"""
+        
+        with self._locks[index]:
+            documents = self._shards[index].values()
+            oldest = min(documents, key=lambda doc: doc.created_at, default=None)
+            newest = max(documents, key=lambda doc: doc.created_at, default=None)
+            return len(documents), oldest, newest
+    
+    def _next_cleanup_delay(self) -> float:
+        """Seconds until the earliest document expires, capped at MAX_CLEANUP_INTERVAL"""
+        
+        next_expiry = None
+        for index in range(SHARD_COUNT):
+            with self._locks[index]:
+                expiry_heap = self._expiry_heaps[index]
+                if expiry_heap and (next_expiry is None or expiry_heap[0][0] < next_expiry):
+                    next_expiry = expiry_heap[0][0]
+        
+        if next_expiry is None:
+            return MAX_CLEANUP_INTERVAL
+        
+        delay = next_expiry - time.monotonic()
+        return min(max(0.0, delay), MAX_CLEANUP_INTERVAL)
+    
+    def _start_cleanup_thread(self):
+        """Start background thread for cleaning up expired documents"""
+        
+        def cleanup_worker():
+            while True:
+                try:
+                    removed = self.cleanup_expired()
+                    if removed > 0:
+                        print(f"Cleaned up {removed} expired documents")
+                    
+                    for task in self._cleanup_tasks:
+                        task()
+                    
+                    # Sleep until the next expiry is due, or a sooner one is stored
+                    self._wake.wait(timeout=self._next_cleanup_delay())
+                    self._wake.clear()
+                except Exception as e:
+                    print(f"Error in cleanup thread: {e}")
+                    time.sleep(60)  # Wait 1 minute before retrying
+        
+        cleanup_thread = threading.Thread(target=cleanup_worker, daemon=True)
+        cleanup_thread.start()
+
+# Global document storage instance
 document_storage = DocumentStorage()
\ No newline at end of file
@@ -0,0 +1,53 @@
+"""
+Page-level PDF text extraction shared with the page worker processes
+
+Spawned workers import this module to unpickle extract_page_range, so it
+must stay free of app state: importing pdf_processor (and through it the
+document storage singleton) would start its threads in every worker.
+"""
+import io
+import logging
+from multiprocessing import shared_memory
+from typing import Iterable, List, Tuple, Optional
+import PyPDF2
+import pdfplumber
+
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+logger = logging.getLogger(__name__)
+
+def extract_page(page, page_num: int) -> Optional[str]:
+    """Extract text from one page, logging and skipping pages that fail"""
+    try:
+        return page.extract_text()
+    except Exception as e:
+        logger.warning("Error extracting page %d: %s", page_num + 1, e)
+        return None
+
+def read_pages(file_obj, backend: str, page_indices: Iterable[int]) -> List[Tuple[int, Optional[str]]]:
+    """Extract text from the given pages of a PDF stream with PyMuPDF, pdfplumber or PyPDF2"""
+    if backend == 'pymupdf':
+        with fitz.open(stream=file_obj.getvalue(), filetype="pdf") as doc:
+            return [(i, doc[i].get_text("text")) for i in page_indices]
+    
+    if backend == 'pdfplumber':
+        with pdfplumber.open(file_obj) as pdf:
+            return [(i, extract_page(pdf.pages[i], i)) for i in page_indices]
+    
+    pdf_reader = PyPDF2.PdfReader(file_obj)
+    return [(i, extract_page(pdf_reader.pages[i], i)) for i in page_indices]
+
+def extract_page_range(shm_name: str, size: int, page_indices: List[int],
+                       backend: str) -> List[Tuple[int, Optional[str]]]:
+    """Worker entry point: extract a range of pages from PDF bytes in shared memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        file_obj = io.BytesIO(bytes(shm.buf[:size]))
+    finally:
+        shm.close()
+    
+    return read_pages(file_obj, backend, page_indices)
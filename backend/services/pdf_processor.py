@@ -1,263 +1,545 @@
-import io
-import logging
-from typing import Tuple, Optional
-import PyPDF2
-import pdfplumber
-from werkzeug.datastructures import FileStorage
-
-logger = logging.getLogger(__name__)
-
-class PDFProcessor:
-    """
-    Service for extracting text from PDF documents
-    Uses multiple libraries for better extraction reliability
-    """
-    
-    def __init__(self):
-        self.max_pages = 50  # Limit for prototype
-        self.min_text_length = 10  # Minimum text length to consider valid
-    
-    def extract_text(self, file: FileStorage) -> Tuple[bool, str, Optional[str]]:
-        """
-        Extract text from PDF file
-        
-        Args:
-            file: Uploaded PDF file
-        
-        Returns:
-            Tuple of (success, extracted_text, error_message)
-        """
-        
-        try:
-            # Reset file pointer to beginning
-            file.seek(0)
-            
-            # Try pdfplumber first (better for complex layouts)
-            success, text, error = self._extract_with_pdfplumber(file)
-            
-            if success and len(text.strip()) >= self.min_text_length:
-                logger.info(f"Successfully extracted {len(text)} characters using pdfplumber")
-                return True, text, None
-            
-            # Fallback to PyPDF2
-            file.seek(0)
-            success, text, error = self._extract_with_pypdf2(file)
-            
-            if success and len(text.strip()) >= self.min_text_length:
-                logger.info(f"Successfully extracted {len(text)} characters using PyPDF2")
-                return True, text, None
-            
-            # If both methods failed or produced insufficient text
-            if len(text.strip()) < self.min_text_length:
-                return False, "", "Document appears to be empty or contains only images"
-            
-            return False, "", error or "Failed to extract text from PDF"
-            
-        except Exception as e:
-            logger.error(f"PDF extraction error: {str(e)}")
-            return False, "", f"Error processing PDF: {str(e)}"
-    
-    def _extract_with_pdfplumber(self, file: FileStorage) -> Tuple[bool, str, Optional[str]]:
-        """
-        Extract text using pdfplumber (better for tables and complex layouts)
-        
-        Args:
-            file: PDF file object
-        
-        Returns:
-            Tuple of (success, text, error_message)
-        """
-        
-        try:
-            file_bytes = io.BytesIO(file.read())
-            extracted_text = []
-            
-            with pdfplumber.open(file_bytes) as pdf:
-                total_pages = len(pdf.pages)
-                
-                if total_pages > self.max_pages:
-                    logger.warning(f"PDF has {total_pages} pages, limiting to {self.max_pages}")
-                
-                pages_to_process = min(total_pages, self.max_pages)
-                
-                for page_num in range(pages_to_process):
-                    try:
-                        page = pdf.pages[page_num]
-                        text = page.extract_text()
-                        
-                        if text:
-                            extracted_text.append(f"--- Page {page_num + 1} ---\n{text}\n")
-                        else:
-                            logger.warning(f"No text found on page {page_num + 1}")
-                            
-                    except Exception as e:
-                        logger.warning(f"Error extracting page {page_num + 1}: {str(e)}")
-                        continue
-                
-                full_text = "\n".join(extracted_text)
-                
-                if len(full_text.strip()) < self.min_text_length:
-                    return False, "", "No readable text found in PDF"
-                
-                return True, full_text, None
-                
-        except Exception as e:
-            logger.error(f"pdfplumber extraction error: {str(e)}")
-            return False, "", f"pdfplumber error: {str(e)}"
-    
-    def _extract_with_pypdf2(self, file: FileStorage) -> Tuple[bool, str, Optional[str]]:
-        """
-        Extract text using PyPDF2 (fallback method)
-        
-        Args:
-            file: PDF file object
-        
-        Returns:
-            Tuple of (success, text, error_message)
-        """
-        
-        try:
-            file_bytes = io.BytesIO(file.read())
-            extracted_text = []
-            
-            pdf_reader = PyPDF2.PdfReader(file_bytes)
-            total_pages = len(pdf_reader.pages)
-            
-            if total_pages > self.max_pages:
-                logger.warning(f"PDF has {total_pages} pages, limiting to {self.max_pages}")
-            
-            pages_to_process = min(total_pages, self.max_pages)
-            
-            for page_num in range(pages_to_process):
-                try:
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    
-                    if text:
-                        extracted_text.append(f"--- Page {page_num + 1} ---\n{text}\n")
-                    else:
-                        logger.warning(f"No text found on page {page_num + 1}")
-                        
-                except Exception as e:
-                    logger.warning(f"Error extracting page {page_num + 1}: {str(e)}")
-                    continue
-            
-            full_text = "\n".join(extracted_text)
-            
-            if len(full_text.strip()) < self.min_text_length:
-                return False, "", "No readable text found in PDF"
-            
-            return True, full_text, None
-            
-        except Exception as e:
-            logger.error(f"PyPDF2 extraction error: {str(e)}")
-            return False, "", f"PyPDF2 error: {str(e)}"
-    
-    def extract_text_from_bytes(self, pdf_bytes: bytes) -> str:
-        """
-        Extract text from PDF bytes (for WhatsApp integration)
-        
-        Args:
-            pdf_bytes: PDF file content as bytes
-        
-        Returns:
-            Extracted text content
-        
-        Raises:
-            Exception: If text extraction fails
-        """
-        try:
-            # Try pdfplumber first
-            try:
-                file_obj = io.BytesIO(pdf_bytes)
-                extracted_text = []
-                
-                with pdfplumber.open(file_obj) as pdf:
-                    total_pages = len(pdf.pages)
-                    pages_to_process = min(total_pages, self.max_pages)
-                    
-                    for page_num in range(pages_to_process):
-                        try:
-                            page = pdf.pages[page_num]
-                            text = page.extract_text()
-                            if text:
-                                extracted_text.append(f"--- Page {page_num + 1} ---\n{text}\n")
-                        except Exception as e:
-                            logger.warning(f"Error extracting page {page_num + 1}: {str(e)}")
-                            continue
-                    
-                    full_text = "\n".join(extracted_text)
-                    if len(full_text.strip()) >= self.min_text_length:
-                        logger.info(f"Successfully extracted {len(full_text)} characters from bytes using pdfplumber")
-                        return full_text
-                        
-            except Exception as e:
-                logger.warning(f"pdfplumber failed on bytes: {str(e)}")
-            
-            # Fallback to PyPDF2
-            try:
-                file_obj = io.BytesIO(pdf_bytes)
-                extracted_text = []
-                
-                pdf_reader = PyPDF2.PdfReader(file_obj)
-                total_pages = len(pdf_reader.pages)
-                pages_to_process = min(total_pages, self.max_pages)
-                
-                for page_num in range(pages_to_process):
-                    try:
-                        page = pdf_reader.pages[page_num]
-                        text = page.extract_text()
-                        if text:
-                            extracted_text.append(f"--- Page {page_num + 1} ---\n{text}\n")
-                    except Exception as e:
-                        logger.warning(f"Error extracting page {page_num + 1}: {str(e)}")
-                        continue
-                
-                full_text = "\n".join(extracted_text)
-                if len(full_text.strip()) >= self.min_text_length:
-                    logger.info(f"Successfully extracted {len(full_text)} characters from bytes using PyPDF2")
-                    return full_text
-                    
-            except Exception as e:
-                logger.warning(f"PyPDF2 failed on bytes: {str(e)}")
-            
-            # If both methods fail
-            raise Exception("Document appears to be empty or contains only images")
-            
-        except Exception as e:
-            logger.error(f"PDF bytes extraction failed: {str(e)}")
-            raise Exception(f"Failed to extract text from PDF: {str(e)}")
-
-    def get_document_info(self, file: FileStorage) -> dict:
-        """
-        Get basic information about the PDF document
-        
-        Args:
-            file: PDF file object
-        
-        Returns:
-            Dictionary with document information
-        """
-        
-        try:
-            file.seek(0)
-            file_bytes = io.BytesIO(file.read())
-            
-            with pdfplumber.open(file_bytes) as pdf:
-                return {
-                    'total_pages': len(pdf.pages),
-                    'metadata': pdf.metadata or {},
-                    'file_size': len(file_bytes.getvalue())
-                }
-                
-        except Exception as e:
-            logger.error(f"Error getting document info: {str(e)}")
-            return {
-                'total_pages': 0,
-                'metadata': {},
-                'file_size': 0,
-                'error': str(e)
-            }
-
-# Global PDF processor instance
+import io
+import os
+import hashlib
+import logging
+import time
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator, List, Tuple, Optional
+import PyPDF2
+import pdfplumber
+from werkzeug.datastructures import FileStorage
+
+from config import Config
+from services.pdf_pages import extract_page, extract_page_range
+
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+logger = logging.getLogger(__name__)
+
+# Documents with at most this many pages are extracted in-process
+PARALLEL_PAGE_THRESHOLD = 4
+
+# PyMuPDF pages are cheap enough that fan-out only pays off on longer documents
+PYMUPDF_PARALLEL_PAGE_THRESHOLD = 16
+
+class PDFProcessor:
+    """
+    Service for extracting text from PDF documents
+    Uses multiple libraries for better extraction reliability
+    """
+    
+    def __init__(self):
+        self.max_pages = 50  # Limit for prototype
+        self.min_text_length = 10  # Minimum text length to consider valid
+        self.max_workers = os.cpu_count() or 1
+        self._process_pool = None  # Created on the first large document
+        self._pool_lock = threading.Lock()
+        
+        # Extracted text keyed by a digest of the PDF bytes, in memory (LRU)
+        # and, when configured, on disk so other worker processes can reuse it
+        self._text_cache: OrderedDict = OrderedDict()
+        self._text_cache_size = 64
+        self._cache_lock = threading.Lock()
+        self.cache_dir = os.path.expanduser(Config.PDF_CACHE_DIR) if Config.PDF_CACHE_DIR else None
+        self.cache_max_files = Config.PDF_CACHE_MAX_FILES
+        self.cache_ttl = Config.PDF_CACHE_TTL
+        
+        # Upper bound on this process's view of the disk cache size; reaching
+        # the cap triggers a sweep instead of waiting for the cleanup thread
+        self._disk_entries = 0
+        self._disk_lock = threading.Lock()
+    
+    def _cache_key(self, pdf_bytes: bytes) -> str:
+        """Digest of the PDF bytes used as the extraction cache key, the same content hash the routes compute"""
+        return hashlib.blake2b(pdf_bytes, digest_size=32).hexdigest()
+    
+    def _get_cached_text(self, key: str) -> Optional[str]:
+        """Look up extracted text in memory, then on disk"""
+        
+        with self._cache_lock:
+            text = self._text_cache.get(key)
+            if text is not None:
+                self._text_cache.move_to_end(key)
+                return text
+        
+        if not self.cache_dir:
+            return None
+        
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.txt"), encoding='utf-8') as cache_file:
+                # Document text must not outlive the session it was uploaded in
+                if time.time() - os.fstat(cache_file.fileno()).st_mtime >= self.cache_ttl:
+                    return None
+                text = cache_file.read()
+        except OSError:
+            return None
+        
+        self._remember_text(key, text)
+        return text
+    
+    def _remember_text(self, key: str, text: str):
+        """Add extracted text to the in-memory LRU"""
+        
+        with self._cache_lock:
+            self._text_cache[key] = text
+            self._text_cache.move_to_end(key)
+            if len(self._text_cache) > self._text_cache_size:
+                self._text_cache.popitem(last=False)
+    
+    def _cache_text(self, key: str, text: str):
+        """Cache extracted text in memory and on disk"""
+        
+        self._remember_text(key, text)
+        
+        if not self.cache_dir:
+            return
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = os.path.join(self.cache_dir, f"{key}.txt")
+            # Write then rename so readers never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+                cache_file.write(text)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write PDF text cache: %s", e)
+            return
+        
+        with self._disk_lock:
+            self._disk_entries += 1
+            over_cap = self._disk_entries > self.cache_max_files
+        if over_cap:
+            self.cleanup_disk_cache()
+    
+    def cleanup_disk_cache(self) -> int:
+        """
+        Remove expired files from the on-disk text cache, then the oldest beyond the cap
+        
+        Returns:
+            Number of files removed
+        """
+        
+        if not self.cache_dir:
+            return 0
+        
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as scan:
+                for entry in scan:
+                    if not entry.name.endswith('.txt'):
+                        continue  # Another worker's write in progress
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass  # Removed by another worker
+        except OSError:
+            return 0
+        
+        # Newest first: everything past the cap or the TTL goes
+        entries.sort(reverse=True)
+        expired_before = time.time() - self.cache_ttl
+        keep = {path for mtime, path in entries[:self.cache_max_files] if mtime > expired_before}
+        
+        removed = 0
+        for _, path in entries:
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        
+        with self._disk_lock:
+            self._disk_entries = len(keep)
+        
+        if removed:
+            logger.info("Removed %d cached PDF text files", removed)
+        return removed
+    
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Return the page extraction process pool, starting it on first use"""
+        if self._process_pool is None:
+            with self._pool_lock:
+                if self._process_pool is None:
+                    # Spawned rather than forked: the server process runs other threads
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._process_pool
+    
+    def _extract_pages_parallel(self, pdf_bytes: bytes, backend: str,
+                                pages_to_process: int) -> List[Tuple[int, Optional[str]]]:
+        """
+        Extract pages across worker processes, sharing the PDF bytes through shared memory
+        
+        Args:
+            pdf_bytes: PDF file content
+            backend: 'pymupdf', 'pdfplumber' or 'pypdf2'
+            pages_to_process: Number of leading pages to extract
+        
+        Returns:
+            List of (page_index, text) tuples in page order
+        """
+        
+        workers = min(self.max_workers, pages_to_process)
+        chunk_size = -(-pages_to_process // workers)
+        page_ranges = [
+            list(range(start, min(start + chunk_size, pages_to_process)))
+            for start in range(0, pages_to_process, chunk_size)
+        ]
+        
+        shm = shared_memory.SharedMemory(create=True, size=len(pdf_bytes))
+        try:
+            shm.buf[:len(pdf_bytes)] = pdf_bytes
+            pool = self._get_process_pool()
+            futures = [
+                pool.submit(extract_page_range, shm.name, len(pdf_bytes), page_range, backend)
+                for page_range in page_ranges
+            ]
+            results = [page for future in futures for page in future.result()]
+        finally:
+            shm.close()
+            shm.unlink()
+        
+        return sorted(results)
+    
+    def _collect_pages(self, pdf_bytes: bytes, backend: str, total_pages: int, open_doc) -> str:
+        """
+        Extract and join page texts, fanning out to worker processes for long documents
+        
+        Args:
+            pdf_bytes: PDF file content
+            backend: 'pdfplumber' or 'pypdf2'
+            total_pages: Page count of the document
+            open_doc: Already opened pdfplumber PDF or PyPDF2 reader for the in-process path
+        
+        Returns:
+            Page texts with page separators
+        """
+        
+        pages_to_process = min(total_pages, self.max_pages)
+        
+        if pages_to_process > PARALLEL_PAGE_THRESHOLD and self.max_workers > 1:
+            pages = self._extract_pages_parallel(pdf_bytes, backend, pages_to_process)
+        else:
+            pages = ((i, extract_page(open_doc.pages[i], i)) for i in range(pages_to_process))
+        
+        return self._join_pages((i + 1, text) for i, text in pages)
+    
+    def _join_pages(self, pages: Iterable[Tuple[int, Optional[str]]]) -> str:
+        """Join (page_number, text) pairs into one string with page separators"""
+        
+        # Written straight into one buffer, no per-page formatted strings
+        buf = io.StringIO()
+        for page_num, text in pages:
+            if text:
+                if buf.tell():
+                    buf.write("\n")
+                buf.write("--- Page ")
+                buf.write(str(page_num))
+                buf.write(" ---\n")
+                buf.write(text)
+                buf.write("\n")
+            else:
+                logger.warning("No text found on page %d", page_num)
+        
+        return buf.getvalue()
+    
+    def iter_pages(self, pdf_bytes: bytes) -> Iterator[Tuple[int, Optional[str]]]:
+        """
+        Yield page texts one at a time, so callers can process long documents incrementally
+        
+        Args:
+            pdf_bytes: PDF file content
+        
+        Yields:
+            Tuples of (page_number, text), page numbers starting at 1, up to max_pages
+        """
+        
+        if HAS_PYMUPDF:
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                if doc.page_count > self.max_pages:
+                    logger.warning("PDF has %d pages, limiting to %d", doc.page_count, self.max_pages)
+                
+                for page_num in range(min(doc.page_count, self.max_pages)):
+                    yield page_num + 1, doc[page_num].get_text("text")
+            return
+        
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            if len(pdf.pages) > self.max_pages:
+                logger.warning("PDF has %d pages, limiting to %d", len(pdf.pages), self.max_pages)
+            
+            for page_num in range(min(len(pdf.pages), self.max_pages)):
+                yield page_num + 1, extract_page(pdf.pages[page_num], page_num)
+    
+    def _extract_with_pymupdf(self, pdf_bytes: bytes) -> Tuple[bool, str, Optional[str]]:
+        """
+        Extract text using PyMuPDF (MuPDF's C engine, much faster than pdfminer-based layout analysis)
+        
+        Args:
+            pdf_bytes: PDF file content
+        
+        Returns:
+            Tuple of (success, text, error_message)
+        """
+        
+        try:
+            pages = None
+            if self.max_workers > 1:
+                with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                    page_count = doc.page_count
+                
+                pages_to_process = min(page_count, self.max_pages)
+                if pages_to_process > PYMUPDF_PARALLEL_PAGE_THRESHOLD:
+                    if page_count > self.max_pages:
+                        logger.warning("PDF has %d pages, limiting to %d", page_count, self.max_pages)
+                    pages = ((i + 1, text) for i, text in
+                             self._extract_pages_parallel(pdf_bytes, 'pymupdf', pages_to_process))
+            
+            if pages is None:
+                pages = self.iter_pages(pdf_bytes)
+            
+            full_text = self._join_pages(pages)
+            
+            if len(full_text.strip()) < self.min_text_length:
+                return False, "", "No readable text found in PDF"
+            
+            return True, full_text, None
+            
+        except Exception as e:
+            logger.error("PyMuPDF extraction error: %s", e)
+            return False, "", f"PyMuPDF error: {str(e)}"
+    
+    def extract_text(self, file: FileStorage, content_hash: str = None) -> Tuple[bool, str, Optional[str]]:
+        """
+        Extract text from PDF file
+        
+        Args:
+            file: Uploaded PDF file
+            content_hash: BLAKE2b-256 hex digest of the upload, if the caller already has it (optional)
+        
+        Returns:
+            Tuple of (success, extracted_text, error_message)
+        """
+        
+        try:
+            # Read the upload once; every backend parses these same bytes. Werkzeug
+            # spools small uploads in memory, and read() keeps them there
+            file.seek(0)
+            pdf_bytes = file.read()
+        except Exception as e:
+            logger.error("PDF extraction error: %s", e)
+            return False, "", f"Error processing PDF: {str(e)}"
+        
+        return self._extract(pdf_bytes, content_hash)
+    
+    def extract_text_from_bytes(self, pdf_bytes: bytes, content_hash: str = None) -> str:
+        """
+        Extract text from PDF bytes (for WhatsApp integration)
+        
+        Args:
+            pdf_bytes: PDF file content as bytes
+            content_hash: BLAKE2b-256 hex digest of pdf_bytes, if the caller already has it (optional)
+        
+        Returns:
+            Extracted text content
+        
+        Raises:
+            Exception: If text extraction fails
+        """
+        success, text, error = self._extract(pdf_bytes, content_hash)
+        if not success:
+            logger.error("PDF bytes extraction failed: %s", error)
+            raise Exception(f"Failed to extract text from PDF: {error}")
+        
+        return text
+    
+    def _extract(self, pdf_bytes: bytes, content_hash: str = None) -> Tuple[bool, str, Optional[str]]:
+        """Extract text from PDF bytes, reusing a cached extraction of identical bytes"""
+        
+        # Reuse the caller's digest rather than hashing the whole upload a second time
+        cache_key = content_hash or self._cache_key(pdf_bytes)
+        cached_text = self._get_cached_text(cache_key)
+        if cached_text is not None:
+            logger.info("Using cached text extraction (%d characters)", len(cached_text))
+            return True, cached_text, None
+        
+        success, text, error = self._extract_text_uncached(pdf_bytes)
+        if success:
+            self._cache_text(cache_key, text)
+        return success, text, error
+    
+    def _extract_text_uncached(self, pdf_bytes: bytes) -> Tuple[bool, str, Optional[str]]:
+        """Run the extraction backends in order of preference"""
+        
+        try:
+            # Try PyMuPDF first (fastest), it reads the bytes directly
+            if HAS_PYMUPDF:
+                success, text, error = self._extract_with_pymupdf(pdf_bytes)
+                
+                if success and len(text.strip()) >= self.min_text_length:
+                    logger.info("Successfully extracted %d characters using PyMuPDF", len(text))
+                    return True, text, None
+                
+                # Without any fonts there is no text layer, so the other backends would also fail
+                if self._has_fonts(pdf_bytes) is False:
+                    return False, "", "Document appears to be empty or contains only images"
+            
+            # Fall back to pdfplumber (better for tables and complex layouts)
+            success, text, error = self._extract_with_pdfplumber(pdf_bytes)
+            
+            if success and len(text.strip()) >= self.min_text_length:
+                logger.info("Successfully extracted %d characters using pdfplumber", len(text))
+                return True, text, None
+            
+            # Fallback to PyPDF2
+            success, text, error = self._extract_with_pypdf2(pdf_bytes)
+            
+            if success and len(text.strip()) >= self.min_text_length:
+                logger.info("Successfully extracted %d characters using PyPDF2", len(text))
+                return True, text, None
+            
+            # If both methods failed or produced insufficient text
+            if len(text.strip()) < self.min_text_length:
+                return False, "", "Document appears to be empty or contains only images"
+            
+            return False, "", error or "Failed to extract text from PDF"
+            
+        except Exception as e:
+            logger.error("PDF extraction error: %s", e)
+            return False, "", f"Error processing PDF: {str(e)}"
+    
+    def _has_fonts(self, pdf_bytes: bytes) -> Optional[bool]:
+        """
+        Check whether any page within max_pages references a font, without extracting text
+        
+        Args:
+            pdf_bytes: PDF file content
+        
+        Returns:
+            True or False, or None if PyMuPDF is unavailable or can't open the document
+        """
+        
+        if not HAS_PYMUPDF:
+            return None
+        
+        try:
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                return any(doc.get_page_fonts(i) for i in range(min(doc.page_count, self.max_pages)))
+        except Exception as e:
+            logger.warning("Could not inspect PDF fonts: %s", e)
+            return None
+    
+    def _extract_with_pdfplumber(self, pdf_bytes: bytes) -> Tuple[bool, str, Optional[str]]:
+        """
+        Extract text using pdfplumber (better for tables and complex layouts)
+        
+        Args:
+            pdf_bytes: PDF file content
+        
+        Returns:
+            Tuple of (success, text, error_message)
+        """
+        
+        try:
+            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+                total_pages = len(pdf.pages)
+                
+                if total_pages > self.max_pages:
+                    logger.warning("PDF has %d pages, limiting to %d", total_pages, self.max_pages)
+                
+                full_text = self._collect_pages(pdf_bytes, 'pdfplumber', total_pages, pdf)
+                
+                if len(full_text.strip()) < self.min_text_length:
+                    return False, "", "No readable text found in PDF"
+                
+                return True, full_text, None
+                
+        except Exception as e:
+            logger.error("pdfplumber extraction error: %s", e)
+            return False, "", f"pdfplumber error: {str(e)}"
+    
+    def _extract_with_pypdf2(self, pdf_bytes: bytes) -> Tuple[bool, str, Optional[str]]:
+        """
+        Extract text using PyPDF2 (fallback method)
+        
+        Args:
+            pdf_bytes: PDF file content
+        
+        Returns:
+            Tuple of (success, text, error_message)
+        """
+        
+        try:
+            pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+            total_pages = len(pdf_reader.pages)
+            
+            if total_pages > self.max_pages:
+                logger.warning("PDF has %d pages, limiting to %d", total_pages, self.max_pages)
+            
+            full_text = self._collect_pages(pdf_bytes, 'pypdf2', total_pages, pdf_reader)
+            
+            if len(full_text.strip()) < self.min_text_length:
+                return False, "", "No readable text found in PDF"
+            
+            return True, full_text, None
+            
+        except Exception as e:
+            logger.error("PyPDF2 extraction error: %s", e)
+            return False, "", f"PyPDF2 error: {str(e)}"
+    
+    def get_document_info(self, file: FileStorage) -> dict:
+        """
+        Get basic information about the PDF document
+        
+        Args:
+            file: PDF file object
+        
+        Returns:
+            Dictionary with document information
+        """
+        
+        try:
+            file.seek(0)
+            pdf_bytes = file.read()
+            
+            if HAS_PYMUPDF:
+                # Reads the page tree and info dict only; no page content is decoded
+                with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                    # Drop the empty placeholders fitz reports for unset fields
+                    metadata = {key: value for key, value in (doc.metadata or {}).items() if value}
+                    return {
+                        'total_pages': doc.page_count,
+                        'metadata': metadata,
+                        'file_size': len(pdf_bytes)
+                    }
+            
+            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+                return {
+                    'total_pages': len(pdf.pages),
+                    'metadata': pdf.metadata or {},
+                    'file_size': len(pdf_bytes)
+                }
+                
+        except Exception as e:
+            logger.error("Error getting document info: %s", e)
+            return {
+                'total_pages': 0,
+                'metadata': {},
+                'file_size': 0,
+                'error': str(e)
+            }
+
+# Global PDF processor instance
 pdf_processor = PDFProcessor()
\ No newline at end of file
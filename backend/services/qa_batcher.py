@@ -0,0 +1,96 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+
+from services.ai_analyzer import get_ai_analyzer
+
+logger = logging.getLogger(__name__)
+
+class QABatcher:
+    """
+    Coalesces questions about the same document into batched AI calls
+
+    The first question for a document is answered immediately. Questions that
+    arrive while that call is in flight are queued and answered together in a
+    single multi-question prompt once it finishes.
+    """
+
+    def __init__(self, max_batch_size: int = 5):
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, List[Tuple[Future, str]]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, document_id: str, document_text: str, question: str) -> Future:
+        """
+        Submit a question about a document
+
+        Args:
+            document_id: Document identifier used to group questions
+            document_text: Document text to answer from
+            question: User's question
+
+        Returns:
+            Future resolving to the answer dictionary
+        """
+
+        future = Future()
+
+        with self._lock:
+            if document_id in self._pending:
+                # A call is already in flight for this document, join the next batch
+                self._pending[document_id].append((future, question))
+                return future
+            self._pending[document_id] = []
+
+        # Fast path: nothing in flight, answer on the caller's thread
+        try:
+            future.set_result(get_ai_analyzer().answer_question(document_text, question))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            self._schedule_drain(document_id, document_text)
+
+        return future
+
+    def _schedule_drain(self, document_id: str, document_text: str):
+        """Answer queued questions in the background, or release the document"""
+
+        with self._lock:
+            if not self._pending.get(document_id):
+                self._pending.pop(document_id, None)
+                return
+
+        drain_thread = threading.Thread(
+            target=self._drain,
+            args=(document_id, document_text),
+            daemon=True
+        )
+        drain_thread.start()
+
+    def _drain(self, document_id: str, document_text: str):
+        """Answer queued questions for a document until none are left"""
+
+        while True:
+            with self._lock:
+                queued = self._pending.get(document_id)
+                if not queued:
+                    self._pending.pop(document_id, None)
+                    return
+                batch = queued[:self.max_batch_size]
+                self._pending[document_id] = queued[self.max_batch_size:]
+
+            questions = [question for _, question in batch]
+            logger.info(f"Answering {len(questions)} batched questions for document {document_id}")
+
+            try:
+                answers = get_ai_analyzer().answer_questions_batch(document_text, questions)
+                for (future, _), answer in zip(batch, answers):
+                    future.set_result(answer)
+            except Exception as e:
+                for future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+# Global Q&A batcher instance
+qa_batcher = QABatcher()
@@ -0,0 +1,42 @@
+import pytest
+
+from services import analysis_worker as worker_module
+from services.ai_analyzer import AIAnalyzer
+from services.analysis_worker import AnalysisWorker
+from services.document_storage import DocumentStorage
+
+DOCUMENT_TEXT = "The tenant shall pay rent on the first day of each month. " * 10
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = AIAnalyzer()
+    analyzer.use_gemini_api = True
+    monkeypatch.setattr(worker_module, 'get_ai_analyzer', lambda: analyzer)
+    return analyzer
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage = DocumentStorage()
+    monkeypatch.setattr(worker_module, 'document_storage', storage)
+    return storage
+
+def test_failed_api_call_is_not_cached(analyzer, storage, monkeypatch):
+    monkeypatch.setattr(analyzer, '_call_gemini_api', lambda prompt: "Error: API call failed (500)")
+    document_id = storage.store_document(DOCUMENT_TEXT, 'lease.pdf', 'failed-hash')
+
+    result = AnalysisWorker(max_workers=1).analyze_and_store(document_id, DOCUMENT_TEXT, 'lease.pdf', 'failed-hash')
+
+    assert result['error'] == "Error: API call failed (500)"
+    assert storage.get_analysis_by_hash('failed-hash') is None
+    assert not analyzer._analysis_cache
+    assert storage.get_document(document_id).analysis_result['error'] == result['error']
+
+def test_successful_analysis_is_cached(analyzer, storage, monkeypatch):
+    response = '{"summary": "A lease.", "key_points": ["Rent is monthly"], "warnings": []}'
+    monkeypatch.setattr(analyzer, '_call_gemini_api', lambda prompt: response)
+    document_id = storage.store_document(DOCUMENT_TEXT, 'lease.pdf', 'good-hash')
+
+    result = AnalysisWorker(max_workers=1).analyze_and_store(document_id, DOCUMENT_TEXT, 'lease.pdf', 'good-hash')
+
+    assert 'error' not in result
+    assert storage.get_analysis_by_hash('good-hash')['summary'] == "A lease."
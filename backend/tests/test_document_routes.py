@@ -0,0 +1,43 @@
+import pytest
+from flask import Flask
+
+from api import document_routes
+from services.document_storage import DocumentStorage
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage = DocumentStorage()
+    monkeypatch.setattr(document_routes, 'document_storage', storage)
+    return storage
+
+@pytest.fixture
+def client(storage):
+    app = Flask(__name__)
+    app.register_blueprint(document_routes.document_bp, url_prefix='/api/document')
+    return app.test_client()
+
+def test_info_reports_processing_until_analysis_is_stored(client, storage):
+    document_id = storage.store_document("Lease text", 'lease.pdf')
+
+    document_info = client.get(f'/api/document/info/{document_id}').get_json()['document_info']
+
+    assert document_info['has_analysis'] is False
+    assert 'analysis' not in document_info
+
+def test_info_returns_stored_analysis(client, storage):
+    document_id = storage.store_document("Lease text", 'lease.pdf')
+    storage.update_analysis(document_id, {
+        'summary': 'A lease.',
+        'key_points': ['Rent is monthly'],
+        'warnings': ['Auto-renews']
+    })
+
+    document_info = client.get(f'/api/document/info/{document_id}').get_json()['document_info']
+
+    assert document_info['has_analysis'] is True
+    assert document_info['analysis'] == {
+        'summary': 'A lease.',
+        'key_points': ['Rent is monthly'],
+        'warnings': ['Auto-renews'],
+        'document_id': document_id
+    }
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from services import document_storage as storage_module
+from services.document_storage import DocumentStorage, SHARD_COUNT
+
+class FakeClock:
+    """Stands in for the time module inside document_storage, advanced by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return 1_700_000_000.0 + self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(storage_module, 'time', clock)
+    return clock
+
+@pytest.fixture
+def storage(monkeypatch):
+    # Without the background thread, sweeps only happen when a test asks for one
+    monkeypatch.setattr(DocumentStorage, '_start_cleanup_thread', lambda self: None)
+    return DocumentStorage(session_timeout=10, analysis_cache_ttl=10)
+
+def stored_ids(storage):
+    return {document_id for shard in storage._shards for document_id in shard}
+
+def test_store_and_get_round_trip(storage):
+    document_id = storage.store_document("Lease text ü", 'lease.pdf', 'hash')
+
+    document = storage.get_document(document_id)
+
+    assert document.text == "Lease text ü"
+    assert document.text_length == len("Lease text ü")
+    assert document.filename == 'lease.pdf'
+    assert document.content_hash == 'hash'
+
+def test_documents_expire_in_deadline_order(storage, clock):
+    first = storage.store_document("first")
+    clock.sleep(5)
+    second = storage.store_document("second")
+    clock.sleep(6)
+
+    assert storage.cleanup_expired() == 1
+    assert stored_ids(storage) == {second}
+    assert storage.get_document(first) is None
+    assert storage.get_document(second) is not None
+
+    clock.sleep(5)
+
+    assert storage.cleanup_expired() == 1
+    assert stored_ids(storage) == set()
+    assert all(not heap for heap in storage._expiry_heaps)
+
+def test_refreshed_analysis_is_reinserted_behind_older_entries(storage, clock):
+    storage.cache_analysis('a', {'summary': 'A'})
+    clock.sleep(1)
+    storage.cache_analysis('b', {'summary': 'B'})
+    clock.sleep(1)
+    storage.cache_analysis('a', {'summary': 'A2'})
+    clock.sleep(9.5)
+
+    storage.cleanup_expired()
+
+    assert storage.get_analysis_by_hash('b') is None
+    assert storage.get_analysis_by_hash('a') == {'summary': 'A2'}
+
+def test_deleted_document_leaves_a_stale_heap_entry_that_cleanup_skips(storage, clock):
+    deleted = storage.store_document("deleted")
+    storage.store_document("expired")
+    assert storage.delete_document(deleted)
+    clock.sleep(11)
+
+    assert storage.cleanup_expired() == 1
+    assert stored_ids(storage) == set()
+
+def test_delete_racing_cleanup(storage, clock):
+    document_ids = [storage.store_document(f"document {i}") for i in range(SHARD_COUNT * 20)]
+    clock.sleep(11)
+    removed = []
+
+    def delete_all():
+        removed.extend(document_id for document_id in document_ids if storage.delete_document(document_id))
+
+    def sweep():
+        removed.append(storage.cleanup_expired())
+
+    threads = [threading.Thread(target=delete_all), threading.Thread(target=sweep)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    deleted_count = sum(1 for item in removed if isinstance(item, str))
+    swept_count = sum(item for item in removed if isinstance(item, int))
+    assert deleted_count + swept_count == len(document_ids)
+    assert stored_ids(storage) == set()
+    assert all(not heap for heap in storage._expiry_heaps)
+
+def test_cleanup_wakes_for_a_new_earliest_expiry():
+    storage = DocumentStorage(session_timeout=300)
+    time.sleep(0.05)  # Let the cleanup thread settle into its long idle wait
+
+    storage.session_timeout = 0.1
+    document_id = storage.store_document("short-lived")
+
+    deadline = time.monotonic() + 5
+    while document_id in stored_ids(storage) and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    assert document_id not in stored_ids(storage)
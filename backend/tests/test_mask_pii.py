@@ -0,0 +1,53 @@
+import random
+import re
+
+import pytest
+
+from utils import security
+from utils.security import mask_pii
+
+# Characters PII patterns care about, including every ASCII whitespace
+# character and a few non-ASCII ones that push text onto the str path
+ALPHABET = '0123456789' * 4 + 'ab.@-()_%+|' + ' \t\n\v\f\r\x1c\x1d\x1e\x1f' + '\xa0é'
+
+def sequential_mask_pii(text):
+    """The original masking: one re.sub per pattern, in precedence order"""
+    text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]', text)
+    text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE]', text)
+    text = re.sub(r'\(\d{3}\)\s*\d{3}[-.]?\d{4}', '[PHONE]', text)
+    text = re.sub(r'\b\d{3}-\d{2}-\d{4}\b', '[SSN]', text)
+    text = re.sub(r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b', '[CREDIT_CARD]', text)
+    return text
+
+def random_texts(count, ascii_only):
+    rng = random.Random(1234)
+    alphabet = ALPHABET[:-2] if ascii_only else ALPHABET
+    for _ in range(count):
+        yield ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 60)))
+
+@pytest.fixture
+def without_re2(monkeypatch):
+    monkeypatch.setattr(security, '_PII_RE2', None)
+
+@pytest.mark.parametrize('ascii_only', [True, False])
+def test_single_pass_matches_sequential_substitutions(without_re2, ascii_only):
+    for text in random_texts(20000, ascii_only):
+        assert mask_pii(text) == sequential_mask_pii(text), repr(text)
+
+@pytest.mark.parametrize('separator', [' ', '-', '\v', '\x1c', '\x1f'])
+def test_credit_card_separators_on_bytes_path(without_re2, separator):
+    text = f"card {separator.join(['4111'] * 4)} on file"
+
+    assert mask_pii(text) == "card [CREDIT_CARD] on file"
+
+def test_re2_masks_long_text_like_re(monkeypatch):
+    pytest.importorskip('re2')
+    padding = 'x ' * security._RE2_MIN_LENGTH
+    separators = ' -\t\v\x1c\x1f'
+    text = padding + ' '.join(sep.join(['4111'] * 4) for sep in separators) + ' (555)\v123-4567 a@b.co'
+
+    masked_by_re2 = mask_pii(text)
+    monkeypatch.setattr(security, '_PII_RE2', None)
+
+    assert masked_by_re2 == mask_pii(text) == sequential_mask_pii(text)
+    assert masked_by_re2.count('[CREDIT_CARD]') == len(separators)
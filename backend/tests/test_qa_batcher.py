@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from services import qa_batcher as batcher_module
+from services.qa_batcher import QABatcher
+
+class BlockingAnalyzer:
+    """Holds the first question in flight until released, and records batched calls"""
+
+    def __init__(self, batch_error=None):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.batches = []
+        self.batch_error = batch_error
+
+    def answer_question(self, document_text, question):
+        self.started.set()
+        self.release.wait(timeout=5)
+        return {'answer': question}
+
+    def answer_questions_batch(self, document_text, questions):
+        self.batches.append(list(questions))
+        if self.batch_error:
+            raise self.batch_error
+        return [{'answer': question} for question in questions]
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    analyzer = BlockingAnalyzer()
+    monkeypatch.setattr(batcher_module, 'get_ai_analyzer', lambda: analyzer)
+    return analyzer
+
+def submit_in_flight(batcher, analyzer):
+    """Submit a first question on another thread and wait until its AI call is in flight"""
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.setdefault('future', batcher.submit('doc', 'text', 'first'))
+    )
+    thread.start()
+    assert analyzer.started.wait(timeout=5)
+    return thread, result
+
+def wait_until_released(batcher, document_id):
+    deadline = time.monotonic() + 5
+    while document_id in batcher._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_questions_queued_during_a_call_are_answered_in_one_batch(analyzer):
+    batcher = QABatcher()
+    thread, first = submit_in_flight(batcher, analyzer)
+
+    queued = [batcher.submit('doc', 'text', question) for question in ('second', 'third')]
+    analyzer.release.set()
+    thread.join(timeout=5)
+
+    assert first['future'].result(timeout=5) == {'answer': 'first'}
+    assert [future.result(timeout=5) for future in queued] == [{'answer': 'second'}, {'answer': 'third'}]
+    assert analyzer.batches == [['second', 'third']]
+
+def test_batch_failure_propagates_to_queued_futures(monkeypatch):
+    analyzer = BlockingAnalyzer(batch_error=RuntimeError('batch failed'))
+    monkeypatch.setattr(batcher_module, 'get_ai_analyzer', lambda: analyzer)
+    batcher = QABatcher()
+    thread, first = submit_in_flight(batcher, analyzer)
+
+    queued = [batcher.submit('doc', 'text', question) for question in ('second', 'third')]
+    analyzer.release.set()
+    thread.join(timeout=5)
+
+    assert first['future'].result(timeout=5) == {'answer': 'first'}
+    for future in queued:
+        with pytest.raises(RuntimeError, match='batch failed'):
+            future.result(timeout=5)
+
+def test_pending_entry_cleared_after_answers(analyzer):
+    batcher = QABatcher()
+    thread, first = submit_in_flight(batcher, analyzer)
+
+    queued = batcher.submit('doc', 'text', 'second')
+    analyzer.release.set()
+    thread.join(timeout=5)
+    queued.result(timeout=5)
+    wait_until_released(batcher, 'doc')
+
+    assert batcher._pending == {}
+
+def test_pending_entry_cleared_when_fast_path_fails(monkeypatch):
+    def fail(document_text, question):
+        raise RuntimeError('call failed')
+
+    analyzer = BlockingAnalyzer()
+    analyzer.answer_question = fail
+    monkeypatch.setattr(batcher_module, 'get_ai_analyzer', lambda: analyzer)
+    batcher = QABatcher()
+
+    future = batcher.submit('doc', 'text', 'first')
+
+    with pytest.raises(RuntimeError, match='call failed'):
+        future.result(timeout=5)
+    assert batcher._pending == {}
@@ -0,0 +1,103 @@
+import pytest
+from flask import Flask
+
+from utils import security
+
+class AllowAllTokenBucket:
+    """Stands in for the Redis token bucket, with tokens always available"""
+    
+    def allow(self, route, client, max_tokens, fill_interval, size=1):
+        return True, 0.0
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(security, 'token_bucket', AllowAllTokenBucket())
+    monkeypatch.setattr(security, 'rate_limiter', security.RateLimiter())
+    
+    app = Flask(__name__)
+    
+    @app.route('/limited')
+    @security.rate_limit(max_requests=5, window_seconds=60)
+    def limited():
+        return 'ok'
+    
+    return app.test_client()
+
+def test_blocked_ip_rejected_while_redis_configured(client):
+    security.rate_limiter.block_ip('10.0.0.1')
+    
+    response = client.get('/limited', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    
+    assert response.status_code == 429
+    assert response.get_json()['error']['code'] == 'RATE_LIMIT_EXCEEDED'
+
+def test_unblocked_ip_allowed_while_redis_configured(client):
+    security.rate_limiter.block_ip('10.0.0.1')
+    
+    response = client.get('/limited', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    
+    assert response.status_code == 200
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands RedisRateLimiter uses"""
+    
+    def __init__(self):
+        self.values = {}
+    
+    def register_script(self, script):
+        def run(keys, args):
+            counter_key, blocked_key = keys
+            if blocked_key in self.values:
+                return 0
+            self.values[counter_key] = self.values.get(counter_key, 0) + 1
+            return int(self.values[counter_key] <= int(args[0]))
+        return run
+    
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+    
+    def exists(self, key):
+        return int(key in self.values)
+
+class FailingTokenBucket:
+    def allow(self, *args, **kwargs):
+        raise AssertionError('token bucket must not be used with the redis backend')
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    monkeypatch.setattr(security, 'token_bucket', FailingTokenBucket())
+    monkeypatch.setattr(security, 'rate_limiter', security.RedisRateLimiter(FakeRedis()))
+    
+    app = Flask(__name__)
+    
+    @app.route('/limited')
+    @security.rate_limit(max_requests=2, window_seconds=60)
+    def limited():
+        return 'ok'
+    
+    return app.test_client()
+
+def test_redis_backend_enforces_limit(redis_client):
+    statuses = [
+        redis_client.get('/limited', environ_base={'REMOTE_ADDR': '10.0.0.3'}).status_code
+        for _ in range(3)
+    ]
+    
+    assert statuses == [200, 200, 429]
+
+def test_redis_backend_enforces_blocks(redis_client):
+    security.rate_limiter.block_ip('10.0.0.4')
+    
+    response = redis_client.get('/limited', environ_base={'REMOTE_ADDR': '10.0.0.4'})
+    
+    assert response.status_code == 429
+
+def test_windows_of_different_routes_are_counted_separately():
+    limiter = security.RateLimiter()
+    
+    # A burst on a short-window route must not use up a long-window route
+    for _ in range(5):
+        limiter.is_allowed('10.0.0.5', max_requests=90, window_seconds=1)
+    
+    assert limiter.is_allowed('10.0.0.5', max_requests=1, window_seconds=300)
+    assert not limiter.is_allowed('10.0.0.5', max_requests=1, window_seconds=300)
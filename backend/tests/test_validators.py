@@ -0,0 +1,31 @@
+import tempfile
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from utils.validators import get_upload_size, read_upload_header
+
+PDF_CONTENT = b"%PDF-1.4\n" + b"0" * 2048
+
+def spooled_upload(content, max_size):
+    """Build an upload the way Werkzeug does, in a SpooledTemporaryFile"""
+    stream = tempfile.SpooledTemporaryFile(max_size=max_size)
+    stream.write(content)
+    stream.seek(0)
+    return FileStorage(stream=stream, filename='upload.pdf', content_type='application/pdf')
+
+@pytest.mark.parametrize('max_size, rolled', [(500 * 1024, False), (1024, True)])
+def test_upload_size_keeps_in_memory_spools_in_memory(max_size, rolled):
+    upload = spooled_upload(PDF_CONTENT, max_size)
+
+    assert get_upload_size(upload) == len(PDF_CONTENT)
+    assert upload.stream._rolled is rolled
+    assert upload.stream.tell() == 0
+
+@pytest.mark.parametrize('max_size, rolled', [(500 * 1024, False), (1024, True)])
+def test_upload_header_keeps_in_memory_spools_in_memory(max_size, rolled):
+    upload = spooled_upload(PDF_CONTENT, max_size)
+
+    assert read_upload_header(upload, 8) == b"%PDF-1.4"
+    assert upload.stream._rolled is rolled
+    assert upload.stream.tell() == 0
@@ -0,0 +1,22 @@
+import time
+
+# (whole second, formatted timestamp), replaced atomically as one tuple
+_cached_timestamp = (0, '')
+
+def iso_now() -> str:
+    """
+    Current UTC time as an ISO 8601 string with a Z suffix, at 1-second resolution
+
+    The formatted string is cached and only rebuilt when the second changes,
+    so hot endpoints such as health checks avoid building datetime objects.
+    """
+
+    global _cached_timestamp
+
+    now = int(time.time())
+    second, timestamp = _cached_timestamp
+    if second != now:
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+        _cached_timestamp = (now, timestamp)
+
+    return timestamp
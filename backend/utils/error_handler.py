@@ -1,227 +1,284 @@
-import logging
-import traceback
-from functools import wraps
-from flask import jsonify, request
-from typing import Dict, Any, Optional, Callable
-import time
-
-logger = logging.getLogger(__name__)
-
-class APIError(Exception):
-    """Custom API error class"""
-    
-    def __init__(self, message: str, code: str = 'API_ERROR', status_code: int = 500, details: str = None):
-        self.message = message
-        self.code = code
-        self.status_code = status_code
-        self.details = details or message
-        super().__init__(self.message)
-
-class ValidationError(APIError):
-    """Validation error"""
-    
-    def __init__(self, message: str, details: str = None):
-        super().__init__(message, 'VALIDATION_ERROR', 400, details)
-
-class ProcessingError(APIError):
-    """Processing error"""
-    
-    def __init__(self, message: str, details: str = None):
-        super().__init__(message, 'PROCESSING_ERROR', 500, details)
-
-class RateLimitError(APIError):
-    """Rate limit error"""
-    
-    def __init__(self, message: str = 'Rate limit exceeded', details: str = None):
-        super().__init__(message, 'RATE_LIMIT_ERROR', 429, details)
-
-def handle_api_error(error: APIError) -> tuple:
-    """Handle API errors and return formatted response"""
-    
-    logger.error(f"API Error: {error.code} - {error.message}")
-    
-    return jsonify({
-        'success': False,
-        'error': {
-            'code': error.code,
-            'message': error.message,
-            'details': error.details
-        }
-    }), error.status_code
-
-def handle_unexpected_error(error: Exception) -> tuple:
-    """Handle unexpected errors"""
-    
-    logger.error(f"Unexpected error: {str(error)}")
-    logger.error(traceback.format_exc())
-    
-    # Don't expose internal error details in production
-    if logger.level == logging.DEBUG:
-        details = str(error)
-    else:
-        details = 'An unexpected error occurred. Please try again later.'
-    
-    return jsonify({
-        'success': False,
-        'error': {
-            'code': 'INTERNAL_ERROR',
-            'message': 'Internal server error',
-            'details': details
-        }
-    }), 500
-
-def with_error_handling(f: Callable) -> Callable:
-    """Decorator to add error handling to route functions"""
-    
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        try:
-            return f(*args, **kwargs)
-        except APIError as e:
-            return handle_api_error(e)
-        except Exception as e:
-            return handle_unexpected_error(e)
-    
-    return decorated_function
-
-def with_request_logging(f: Callable) -> Callable:
-    """Decorator to add request logging"""
-    
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        start_time = time.time()
-        
-        # Log request
-        logger.info(f"Request: {request.method} {request.path} from {request.remote_addr}")
-        
-        try:
-            result = f(*args, **kwargs)
-            duration = time.time() - start_time
-            logger.info(f"Request completed in {duration:.3f}s")
-            return result
-        except Exception as e:
-            duration = time.time() - start_time
-            logger.error(f"Request failed after {duration:.3f}s: {str(e)}")
-            raise
-    
-    return decorated_function
-
-def with_retry(max_attempts: int = 3, delay: float = 1.0):
-    """Decorator to add retry logic to functions"""
-    
-    def decorator(f: Callable) -> Callable:
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            last_exception = None
-            
-            for attempt in range(max_attempts):
-                try:
-                    return f(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    if attempt < max_attempts - 1:
-                        logger.warning(f"Attempt {attempt + 1} failed: {str(e)}. Retrying in {delay}s...")
-                        time.sleep(delay)
-                    else:
-                        logger.error(f"All {max_attempts} attempts failed")
-            
-            raise last_exception
-        
-        return decorated_function
-    return decorator
-
-class ErrorTracker:
-    """Simple error tracking for monitoring"""
-    
-    def __init__(self):
-        self.error_counts: Dict[str, int] = {}
-        self.last_errors: Dict[str, float] = {}
-    
-    def track_error(self, error_code: str, error_message: str):
-        """Track an error occurrence"""
-        
-        self.error_counts[error_code] = self.error_counts.get(error_code, 0) + 1
-        self.last_errors[error_code] = time.time()
-        
-        # Log high-frequency errors
-        if self.error_counts[error_code] > 10:
-            logger.warning(f"High frequency error: {error_code} occurred {self.error_counts[error_code]} times")
-    
-    def get_error_stats(self) -> Dict[str, Any]:
-        """Get error statistics"""
-        
-        return {
-            'error_counts': self.error_counts.copy(),
-            'total_errors': sum(self.error_counts.values()),
-            'unique_errors': len(self.error_counts)
-        }
-    
-    def reset_stats(self):
-        """Reset error statistics"""
-        
-        self.error_counts.clear()
-        self.last_errors.clear()
-
-# Global error tracker instance
-error_tracker = ErrorTracker()
-
-def validate_file_upload(file) -> None:
-    """Validate file upload with detailed error messages"""
-    
-    if not file:
-        raise ValidationError('No file provided', 'Please select a file to upload')
-    
-    if file.filename == '':
-        raise ValidationError('Empty filename', 'Please select a valid file')
-    
-    if not file.filename.lower().endswith('.pdf'):
-        raise ValidationError(
-            'Invalid file type', 
-            'Only PDF files are supported. Please upload a PDF document.'
-        )
-    
-    # Check file size
-    file.seek(0, 2)  # Seek to end
-    file_size = file.tell()
-    file.seek(0)  # Reset to beginning
-    
-    max_size = 10 * 1024 * 1024  # 10MB
-    if file_size > max_size:
-        raise ValidationError(
-            'File too large',
-            f'File size ({file_size // (1024*1024)}MB) exceeds the maximum limit of 10MB'
-        )
-    
-    if file_size == 0:
-        raise ValidationError('Empty file', 'The uploaded file is empty')
-
-def validate_question(question: str) -> None:
-    """Validate question input"""
-    
-    if not question or not question.strip():
-        raise ValidationError('Empty question', 'Please provide a question about the document')
-    
-    question = question.strip()
-    
-    if len(question) > 1000:
-        raise ValidationError(
-            'Question too long',
-            'Questions must be less than 1000 characters'
-        )
-    
-    if len(question) < 3:
-        raise ValidationError(
-            'Question too short',
-            'Please provide a more detailed question'
-        )
-    
-    # Check for potentially malicious content
-    suspicious_patterns = ['<script', 'javascript:', 'data:', 'vbscript:']
-    question_lower = question.lower()
-    
-    for pattern in suspicious_patterns:
-        if pattern in question_lower:
-            raise ValidationError(
-                'Invalid question content',
-                'Question contains invalid characters or content'
-            )
\ No newline at end of file
+import json
+import logging
+import traceback
+from functools import wraps
+from flask import Response, jsonify, request
+from typing import Dict, Any, Optional, Callable, Tuple, Type
+import time
+import random
+import threading
+
+from utils.validators import SUSPICIOUS_CONTENT_RE, get_upload_size
+
+logger = logging.getLogger(__name__)
+
+class APIError(Exception):
+    """Custom API error class"""
+    
+    def __init__(self, message: str, code: str = 'API_ERROR', status_code: int = 500, details: str = None):
+        self.message = message
+        self.code = code
+        self.status_code = status_code
+        self.details = details or message
+        super().__init__(self.message)
+
+class ValidationError(APIError):
+    """Validation error"""
+    
+    def __init__(self, message: str, details: str = None):
+        super().__init__(message, 'VALIDATION_ERROR', 400, details)
+
+class ProcessingError(APIError):
+    """Processing error"""
+    
+    def __init__(self, message: str, details: str = None):
+        super().__init__(message, 'PROCESSING_ERROR', 500, details)
+
+class RateLimitError(APIError):
+    """Rate limit error"""
+    
+    def __init__(self, message: str = 'Rate limit exceeded', details: str = None):
+        super().__init__(message, 'RATE_LIMIT_ERROR', 429, details)
+
+def handle_api_error(error: APIError) -> tuple:
+    """Handle API errors and return formatted response"""
+    
+    logger.error("API Error: %s - %s", error.code, error.message)
+    
+    return jsonify({
+        'success': False,
+        'error': {
+            'code': error.code,
+            'message': error.message,
+            'details': error.details
+        }
+    }), error.status_code
+
+def prebuild_error(code: str, message: str, details: str, status_code: int) -> tuple:
+    """Serialize a static error response once so handlers can reuse the bytes"""
+    
+    body = json.dumps({
+        'success': False,
+        'error': {
+            'code': code,
+            'message': message,
+            'details': details
+        }
+    }, separators=(',', ':')).encode('utf-8')
+    
+    return body, status_code
+
+def error_response(prebuilt: tuple) -> Response:
+    """Build a response from a prebuilt error body"""
+    
+    body, status_code = prebuilt
+    return Response(body, status=status_code, mimetype='application/json')
+
+def handle_unexpected_error(error: Exception) -> tuple:
+    """Handle unexpected errors"""
+    
+    logger.error("Unexpected error: %s", error)
+    logger.error(traceback.format_exc())
+    
+    # Don't expose internal error details in production
+    if logger.level == logging.DEBUG:
+        details = str(error)
+    else:
+        details = 'An unexpected error occurred. Please try again later.'
+    
+    return jsonify({
+        'success': False,
+        'error': {
+            'code': 'INTERNAL_ERROR',
+            'message': 'Internal server error',
+            'details': details
+        }
+    }), 500
+
+def with_error_handling(f: Callable) -> Callable:
+    """Decorator to add error handling to route functions"""
+    
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except APIError as e:
+            return handle_api_error(e)
+        except Exception as e:
+            return handle_unexpected_error(e)
+    
+    return decorated_function
+
+def with_request_logging(f: Callable) -> Callable:
+    """Decorator to add request logging"""
+    
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        start_time = time.monotonic()
+        
+        # Log request
+        logger.info("Request: %s %s from %s", request.method, request.path, request.remote_addr)
+        
+        try:
+            result = f(*args, **kwargs)
+            duration = time.monotonic() - start_time
+            logger.info("Request completed in %.3fs", duration)
+            return result
+        except Exception as e:
+            duration = time.monotonic() - start_time
+            logger.error("Request failed after %.3fs: %s", duration, e)
+            raise
+    
+    return decorated_function
+
+def with_retry(max_attempts: int = 3, delay: float = 1.0, max_delay: float = 30.0,
+               exceptions: Tuple[Type[BaseException], ...] = (Exception,)):
+    """
+    Decorator to add retry logic to functions
+    
+    Retries back off exponentially from delay, capped at max_delay, with
+    jitter so concurrent callers don't retry in lockstep.
+    
+    Args:
+        max_attempts: Total number of attempts
+        delay: Base delay in seconds before the first retry
+        max_delay: Upper bound on the backoff before jitter
+        exceptions: Exception types worth retrying; anything else propagates at once
+    """
+    
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            last_exception = None
+            
+            for attempt in range(max_attempts):
+                try:
+                    return f(*args, **kwargs)
+                except exceptions as e:
+                    last_exception = e
+                    if attempt < max_attempts - 1:
+                        sleep_time = min(max_delay, delay * (2 ** attempt)) * (0.5 + random.random())
+                        logger.warning("Attempt %d failed: %s. Retrying in %.2fs...", attempt + 1, e, sleep_time)
+                        time.sleep(sleep_time)
+                    else:
+                        logger.error("All %d attempts failed", max_attempts)
+            
+            raise last_exception
+        
+        return decorated_function
+    return decorator
+
+class ErrorTracker:
+    """Simple error tracking for monitoring"""
+    
+    def __init__(self):
+        self.error_counts: Dict[str, int] = {}
+        self.last_errors: Dict[str, float] = {}
+        self.last_stack_captures: Dict[str, float] = {}
+        
+        # Flask serves requests on several threads; guards all of the above
+        self._lock = threading.Lock()
+    
+    def track_error(self, error_code: str, error_message: str):
+        """Track an error occurrence"""
+        
+        with self._lock:
+            count = self.error_counts.get(error_code, 0) + 1
+            self.error_counts[error_code] = count
+            self.last_errors[error_code] = time.time()
+        
+        # Log high-frequency errors
+        if count > 10:
+            logger.warning("High frequency error: %s occurred %d times", error_code, count)
+    
+    def should_capture_stack(self, error_type: str, min_interval: float = 1.0) -> bool:
+        """Allow at most one full traceback per error type every min_interval seconds"""
+        
+        now = time.monotonic()
+        
+        with self._lock:
+            last_capture = self.last_stack_captures.get(error_type)
+            
+            if last_capture is not None and now - last_capture < min_interval:
+                return False
+            
+            self.last_stack_captures[error_type] = now
+            return True
+    
+    def get_error_stats(self) -> Dict[str, Any]:
+        """Get error statistics"""
+        
+        with self._lock:
+            error_counts = self.error_counts.copy()
+        
+        return {
+            'error_counts': error_counts,
+            'total_errors': sum(error_counts.values()),
+            'unique_errors': len(error_counts)
+        }
+    
+    def reset_stats(self):
+        """Reset error statistics"""
+        
+        with self._lock:
+            self.error_counts.clear()
+            self.last_errors.clear()
+            self.last_stack_captures.clear()
+
+# Global error tracker instance
+error_tracker = ErrorTracker()
+
+def validate_file_upload(file) -> None:
+    """Validate file upload with detailed error messages"""
+    
+    if not file:
+        raise ValidationError('No file provided', 'Please select a file to upload')
+    
+    if file.filename == '':
+        raise ValidationError('Empty filename', 'Please select a valid file')
+    
+    if not file.filename.lower().endswith('.pdf'):
+        raise ValidationError(
+            'Invalid file type', 
+            'Only PDF files are supported. Please upload a PDF document.'
+        )
+    
+    # Check file size
+    file_size = get_upload_size(file)
+    
+    max_size = 10 * 1024 * 1024  # 10MB
+    if file_size > max_size:
+        raise ValidationError(
+            'File too large',
+            f'File size ({file_size // (1024*1024)}MB) exceeds the maximum limit of 10MB'
+        )
+    
+    if file_size == 0:
+        raise ValidationError('Empty file', 'The uploaded file is empty')
+
+def validate_question(question: str) -> None:
+    """Validate question input"""
+    
+    if not question or not question.strip():
+        raise ValidationError('Empty question', 'Please provide a question about the document')
+    
+    question = question.strip()
+    
+    if len(question) > 1000:
+        raise ValidationError(
+            'Question too long',
+            'Questions must be less than 1000 characters'
+        )
+    
+    if len(question) < 3:
+        raise ValidationError(
+            'Question too short',
+            'Please provide a more detailed question'
+        )
+    
+    # Check for potentially malicious content
+    if SUSPICIOUS_CONTENT_RE.search(question):
+        raise ValidationError(
+            'Invalid question content',
+            'Question contains invalid characters or content'
+        )
\ No newline at end of file
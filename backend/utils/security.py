@@ -1,299 +1,677 @@
-import re
-import hashlib
-import secrets
-import time
-from typing import Dict, Optional, Set
-from functools import wraps
-from flask import request, jsonify, g
-import logging
-
-logger = logging.getLogger(__name__)
-
-class RateLimiter:
-    """Simple in-memory rate limiter"""
-    
-    def __init__(self):
-        self.requests: Dict[str, list] = {}
-        self.blocked_ips: Set[str] = set()
-    
-    def is_allowed(self, identifier: str, max_requests: int = 10, window_seconds: int = 60) -> bool:
-        """Check if request is allowed based on rate limits"""
-        
-        if identifier in self.blocked_ips:
-            return False
-        
-        current_time = time.time()
-        
-        # Clean old requests
-        if identifier in self.requests:
-            self.requests[identifier] = [
-                req_time for req_time in self.requests[identifier]
-                if current_time - req_time < window_seconds
-            ]
-        else:
-            self.requests[identifier] = []
-        
-        # Check rate limit
-        if len(self.requests[identifier]) >= max_requests:
-            logger.warning(f"Rate limit exceeded for {identifier}")
-            return False
-        
-        # Add current request
-        self.requests[identifier].append(current_time)
-        return True
-    
-    def block_ip(self, ip: str, duration: int = 3600):
-        """Block an IP address for a duration"""
-        self.blocked_ips.add(ip)
-        logger.warning(f"Blocked IP {ip} for {duration} seconds")
-        
-        # TODO: In production, use a proper scheduler to unblock
-        # For now, this is a simple in-memory implementation
-
-# Global rate limiter instance
-rate_limiter = RateLimiter()
-
-def rate_limit(max_requests: int = 10, window_seconds: int = 60):
-    """Rate limiting decorator"""
-    
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            # Use IP address as identifier
-            identifier = request.remote_addr or 'unknown'
-            
-            if not rate_limiter.is_allowed(identifier, max_requests, window_seconds):
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'RATE_LIMIT_EXCEEDED',
-                        'message': 'Too many requests',
-                        'details': f'Maximum {max_requests} requests per {window_seconds} seconds allowed'
-                    }
-                }), 429
-            
-            return f(*args, **kwargs)
-        
-        return decorated_function
-    return decorator
-
-def sanitize_input(text: str) -> str:
-    """Sanitize user input to prevent XSS and injection attacks"""
-    
-    if not text:
-        return ""
-    
-    # Remove potentially dangerous characters and patterns
-    text = re.sub(r'<[^>]*>', '', text)  # Remove HTML tags
-    text = re.sub(r'javascript:', '', text, flags=re.IGNORECASE)  # Remove javascript:
-    text = re.sub(r'data:', '', text, flags=re.IGNORECASE)  # Remove data:
-    text = re.sub(r'vbscript:', '', text, flags=re.IGNORECASE)  # Remove vbscript:
-    
-    # Limit length
-    if len(text) > 10000:
-        text = text[:10000]
-    
-    return text.strip()
-
-def sanitize_filename(filename: str) -> str:
-    """Sanitize filename for safe storage"""
-    
-    if not filename:
-        return "document.pdf"
-    
-    # Remove path components
-    filename = filename.split('/')[-1].split('\\')[-1]
-    
-    # Replace unsafe characters
-    unsafe_chars = '<>:"/\\|?*'
-    for char in unsafe_chars:
-        filename = filename.replace(char, '_')
-    
-    # Remove control characters
-    filename = ''.join(char for char in filename if ord(char) >= 32)
-    
-    # Limit length
-    if len(filename) > 255:
-        name, ext = filename.rsplit('.', 1) if '.' in filename else (filename, '')
-        filename = name[:250] + ('.' + ext if ext else '')
-    
-    return filename
-
-def mask_pii(text: str) -> str:
-    """Basic PII masking for document text"""
-    
-    if not text:
-        return text
-    
-    # Email addresses
-    text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]', text)
-    
-    # Phone numbers (basic patterns)
-    text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE]', text)
-    text = re.sub(r'\(\d{3}\)\s*\d{3}[-.]?\d{4}', '[PHONE]', text)
-    
-    # Social Security Numbers
-    text = re.sub(r'\b\d{3}-\d{2}-\d{4}\b', '[SSN]', text)
-    
-    # Credit card numbers (basic pattern)
-    text = re.sub(r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b', '[CREDIT_CARD]', text)
-    
-    return text
-
-def generate_secure_token() -> str:
-    """Generate a secure random token"""
-    return secrets.token_urlsafe(32)
-
-def hash_document_id(document_id: str) -> str:
-    """Hash document ID for logging without exposing actual ID"""
-    return hashlib.sha256(document_id.encode()).hexdigest()[:16]
-
-def validate_request_size(max_size: int = 10485760):  # 10MB default
-    """Validate request content length"""
-    
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            content_length = request.content_length
-            
-            if content_length and content_length > max_size:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'REQUEST_TOO_LARGE',
-                        'message': 'Request too large',
-                        'details': f'Maximum request size is {max_size // (1024*1024)}MB'
-                    }
-                }), 413
-            
-            return f(*args, **kwargs)
-        
-        return decorated_function
-    return decorator
-
-def require_https():
-    """Decorator to require HTTPS in production"""
-    
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            # Skip HTTPS check in development
-            import os
-            if os.environ.get('FLASK_ENV') == 'development':
-                return f(*args, **kwargs)
-            
-            if not request.is_secure and request.headers.get('X-Forwarded-Proto') != 'https':
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'HTTPS_REQUIRED',
-                        'message': 'HTTPS required',
-                        'details': 'This endpoint requires a secure connection'
-                    }
-                }), 400
-            
-            return f(*args, **kwargs)
-        
-        return decorated_function
-    return decorator
-
-def add_security_headers(response):
-    """Add security headers to response"""
-    
-    # Prevent clickjacking
-    response.headers['X-Frame-Options'] = 'DENY'
-    
-    # Prevent MIME type sniffing
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    
-    # XSS protection
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    
-    # Referrer policy
-    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-    
-    # Content Security Policy (basic)
-    response.headers['Content-Security-Policy'] = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline'; "
-        "style-src 'self' 'unsafe-inline'; "
-        "img-src 'self' data:; "
-        "font-src 'self'; "
-        "connect-src 'self'"
-    )
-    
-    # HSTS (only in production with HTTPS)
-    if request.is_secure or request.headers.get('X-Forwarded-Proto') == 'https':
-        response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-    
-    return response
-
-class SecurityMonitor:
-    """Monitor security events"""
-    
-    def __init__(self):
-        self.suspicious_activities: Dict[str, int] = {}
-        self.blocked_attempts: int = 0
-    
-    def log_suspicious_activity(self, ip: str, activity: str):
-        """Log suspicious activity"""
-        
-        key = f"{ip}:{activity}"
-        self.suspicious_activities[key] = self.suspicious_activities.get(key, 0) + 1
-        
-        logger.warning(f"Suspicious activity from {ip}: {activity}")
-        
-        # Auto-block after multiple suspicious activities
-        if self.suspicious_activities[key] > 5:
-            rate_limiter.block_ip(ip)
-            self.blocked_attempts += 1
-    
-    def get_security_stats(self) -> Dict:
-        """Get security statistics"""
-        
-        return {
-            'suspicious_activities': len(self.suspicious_activities),
-            'blocked_attempts': self.blocked_attempts,
-            'blocked_ips': len(rate_limiter.blocked_ips)
-        }
-
-# Global security monitor
-security_monitor = SecurityMonitor()
-
-def detect_malicious_content(text: str) -> bool:
-    """Detect potentially malicious content in text"""
-    
-    if not text:
-        return False
-    
-    text_lower = text.lower()
-    
-    # Check for script injection attempts
-    malicious_patterns = [
-        '<script',
-        'javascript:',
-        'data:text/html',
-        'vbscript:',
-        'onload=',
-        'onerror=',
-        'eval(',
-        'document.cookie',
-        'window.location',
-        'alert(',
-    ]
-    
-    for pattern in malicious_patterns:
-        if pattern in text_lower:
-            return True
-    
-    return False
-
-def log_security_event(event_type: str, details: str, ip: str = None):
-    """Log security events for monitoring"""
-    
-    ip = ip or request.remote_addr or 'unknown'
-    
-    logger.warning(f"Security Event [{event_type}] from {ip}: {details}")
-    
-    # Track in security monitor
+import os
+import re
+import atexit
+import queue
+import math
+import base64
+import hashlib
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+from functools import lru_cache, wraps
+from flask import request, jsonify, g
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from collections import Counter, OrderedDict
+
+from config import Config
+from utils.token_bucket import create_redis_client, token_bucket
+
+try:
+    import re2
+    HAS_RE2 = True
+except ImportError:
+    HAS_RE2 = False
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+logger = logging.getLogger(__name__)
+
+# Security events are written by a background thread so request threads
+# never block on log I/O - under attack is exactly when most events arrive
+_log_queue = queue.SimpleQueue()
+_event_logger = logging.getLogger(f"{__name__}.events")
+_event_logger.addHandler(QueueHandler(_log_queue))
+_event_logger.propagate = False
+_log_listener: Optional[QueueListener] = None
+_log_listener_lock = threading.Lock()
+
+# Markup and script-scheme fragments stripped from user input
+_SANITIZE_RE = re.compile(r'<[^>]*>|javascript:|data:|vbscript:', re.IGNORECASE)
+# Every match contains one of these, so text without them can skip the regex
+_SANITIZE_TRIGGERS = '<:'
+
+# PII patterns and their replacements, applied one after another in this
+# order. A single fused pass is not equivalent: where matches overlap (e.g.
+# "(008) 3900106372") leftmost-first alternation picks a different one
+_PII_SUBSTITUTIONS = (
+    (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]'),
+    (r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE]'),
+    (r'\(\d{3}\)\s*\d{3}[-.]?\d{4}', '[PHONE]'),
+    (r'\b\d{3}-\d{2}-\d{4}\b', '[SSN]'),
+    (r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b', '[CREDIT_CARD]')
+)
+# The same patterns written for ASCII text, matched over bytes, which the regex
+# engine scans faster. \b and \d already agree with the str patterns on ASCII,
+# but bytes \s is only [\t\n\v\f\r ] while str \s also matches the separator
+# controls \x1c-\x1f, so whitespace is spelled out as [\t-\r\x1c-\x20]
+_PII_ASCII_SUBSTITUTIONS = (
+    (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]'),
+    (r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE]'),
+    (r'\(\d{3}\)[\t-\r\x1c-\x20]*\d{3}[-.]?\d{4}', '[PHONE]'),
+    (r'\b\d{3}-\d{2}-\d{4}\b', '[SSN]'),
+    (r'\b\d{4}[\t-\r\x1c-\x20-]?\d{4}[\t-\r\x1c-\x20-]?\d{4}[\t-\r\x1c-\x20-]?\d{4}\b', '[CREDIT_CARD]')
+)
+
+def _compile_pii(compile_pattern, substitutions, encode=lambda value: value):
+    """Compile PII substitutions plus one fused pattern that finds whether any of them match"""
+    compiled = tuple((compile_pattern(encode(pattern)), encode(tag)) for pattern, tag in substitutions)
+    detector = compile_pattern(encode('|'.join(pattern for pattern, _ in substitutions)))
+    return detector, compiled
+
+_PII_RE, _PII_RES = _compile_pii(re.compile, _PII_SUBSTITUTIONS)
+_PII_BYTES_RE, _PII_BYTES_RES = _compile_pii(
+    re.compile, _PII_ASCII_SUBSTITUTIONS, lambda value: value.encode('ascii')
+)
+# RE2 matches in linear time, so it's used for long texts where the email
+# pattern can otherwise backtrack quadratically (e.g. "a.a.a.a..."). Its \b
+# and \d are ASCII-only and its \s leaves out \v and \x1c-\x1f, so it runs
+# the ASCII patterns and only on ASCII text, where it matches what re does
+_PII_RE2, _PII_RE2S = _compile_pii(re2.compile, _PII_ASCII_SUBSTITUTIONS) if HAS_RE2 else (None, ())
+_RE2_MIN_LENGTH = 4096
+
+# Replaces characters unsafe in filenames with underscores and drops control characters
+_FILENAME_TABLE = str.maketrans('<>:"/\\|?*', '_' * 9, ''.join(map(chr, range(32))))
+
+# Script injection markers looked for in text
+_MALICIOUS_PATTERNS = (
+    '<script',
+    'javascript:',
+    'data:text/html',
+    'vbscript:',
+    'onload=',
+    'onerror=',
+    'eval(',
+    'document.cookie',
+    'window.location',
+    'alert(',
+)
+_MALICIOUS_RE = re.compile('|'.join(map(re.escape, _MALICIOUS_PATTERNS)), re.IGNORECASE)
+# Every pattern contains one of these, so text without them can't match
+_MALICIOUS_TRIGGERS = '<:=(.'
+
+# Text is lowercased and scanned in chunks that overlap by enough to catch
+# a pattern straddling two chunks, so long documents are never copied whole
+_SCAN_CHUNK_SIZE = 4096
+_SCAN_OVERLAP = max(map(len, _MALICIOUS_PATTERNS)) - 1
+
+def _build_malicious_automaton():
+    """Build an Aho-Corasick automaton matching all malicious patterns in one pass"""
+    automaton = ahocorasick.Automaton()
+    for pattern in _MALICIOUS_PATTERNS:
+        automaton.add_word(pattern, pattern)
+    automaton.make_automaton()
+    return automaton
+
+_MALICIOUS_AUTOMATON = _build_malicious_automaton() if HAS_AHOCORASICK else None
+
+# Random bytes are fetched from the OS in blocks and handed out per token
+_RANDOM_BLOCK_SIZE = 4096
+_random_buffer = bytearray()
+_random_lock = threading.Lock()
+
+def _discard_random_buffer():
+    """Forget buffered random bytes so forked workers never hand out the same tokens"""
+    global _random_lock
+    _random_buffer.clear()
+    _random_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_discard_random_buffer)
+
+# Seconds between sweeps of idle rate limiter entries and expired IP blocks
+SWEEP_INTERVAL = 300
+
+# Number of independently locked rate limiter shards (must be a power of two)
+SHARD_COUNT = 64
+
+# Most clients tracked at once; beyond this the least recently seen are evicted
+MAX_TRACKED_CLIENTS = 16384
+
+class RateLimiter:
+    """
+    Simple in-memory rate limiter
+    Uses a sliding window counter: each identifier keeps only the request counts
+    of the current and previous fixed windows
+    """
+    
+    def __init__(self):
+        # (identifier, window_seconds) -> (window_id, current_count, previous_count,
+        # stale_at), spread across shards with their own locks so different clients
+        # don't contend. Routes with different windows keep separate counters.
+        # Each shard is a bounded LRU, so rotating identifiers can't grow memory
+        # without limit between sweeps
+        self._shards: List[OrderedDict[Tuple[str, int], Tuple[int, int, int, float]]] = [
+            OrderedDict() for _ in range(SHARD_COUNT)
+        ]
+        self._shard_capacity = MAX_TRACKED_CLIENTS // SHARD_COUNT
+        self._locks = [threading.Lock() for _ in range(SHARD_COUNT)]
+        
+        # ip -> time.monotonic() at which the block lifts
+        self.blocked_ips: Dict[str, float] = {}
+        self._blocked_lock = threading.Lock()
+        
+        self.last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+    
+    def is_allowed(self, identifier: str, max_requests: int = 10, window_seconds: int = 60) -> bool:
+        """Check if request is allowed based on rate limits"""
+        
+        current_time = time.monotonic()
+        
+        # One request thread sweeps; the others carry on without waiting for it
+        if current_time - self.last_sweep > SWEEP_INTERVAL and self._sweep_lock.acquire(blocking=False):
+            try:
+                if current_time - self.last_sweep > SWEEP_INTERVAL:
+                    self._sweep(current_time)
+            finally:
+                self._sweep_lock.release()
+        
+        if self.blocked_ips:
+            with self._blocked_lock:
+                unblock_at = self.blocked_ips.get(identifier)
+                if unblock_at is not None:
+                    if current_time < unblock_at:
+                        return False
+                    del self.blocked_ips[identifier]
+        
+        window_id = int(current_time // window_seconds)
+        
+        # Both counts stop mattering once the next window has fully passed
+        stale_at = (window_id + 2) * window_seconds
+        
+        # Weight the previous window by how much of it still overlaps the sliding window
+        overlap = 1 - (current_time % window_seconds) / window_seconds
+        
+        key = (identifier, window_seconds)
+        index = hash(key) & (SHARD_COUNT - 1)
+        requests = self._shards[index]
+        with self._locks[index]:
+            # Roll the counters forward to the current window
+            entry = requests.get(key)
+            if entry is None or entry[0] < window_id - 1:
+                current_count, previous_count = 0, 0
+            elif entry[0] == window_id - 1:
+                current_count, previous_count = 0, entry[1]
+            else:
+                current_count, previous_count = entry[1], entry[2]
+            
+            allowed = previous_count * overlap + current_count < max_requests
+            if allowed:
+                # Count current request
+                current_count += 1
+            requests[key] = (window_id, current_count, previous_count, stale_at)
+            requests.move_to_end(key)
+            while len(requests) > self._shard_capacity:
+                requests.popitem(last=False)
+        
+        if not allowed:
+            logger.warning(f"Rate limit exceeded for {identifier}")
+        return allowed
+    
+    def _sweep(self, current_time: float):
+        """Drop idle counters and expired IP blocks so memory stays bounded"""
+        
+        for requests, lock in zip(self._shards, self._locks):
+            with lock:
+                for key, entry in list(requests.items()):
+                    if entry[3] <= current_time:
+                        del requests[key]
+        
+        with self._blocked_lock:
+            for ip, unblock_at in list(self.blocked_ips.items()):
+                if unblock_at <= current_time:
+                    del self.blocked_ips[ip]
+        
+        self.last_sweep = current_time
+    
+    def is_blocked(self, ip: str) -> bool:
+        """Check whether an IP address is currently blocked"""
+        
+        if not self.blocked_ips:
+            return False
+        
+        with self._blocked_lock:
+            unblock_at = self.blocked_ips.get(ip)
+            return unblock_at is not None and time.monotonic() < unblock_at
+    
+    def block_ip(self, ip: str, duration: int = 3600):
+        """Block an IP address for a duration"""
+        with self._blocked_lock:
+            self.blocked_ips[ip] = time.monotonic() + duration
+        logger.warning(f"Blocked IP {ip} for {duration} seconds")
+
+# Count a request in the current fixed window and report whether it fits.
+# The counter key expires with its window, so nothing needs sweeping.
+# Returns 0 outright while the identifier is blocked.
+_RATE_LIMIT_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then return 0 end
+local n = redis.call('INCR', KEYS[1])
+if n == 1 then redis.call('EXPIRE', KEYS[1], ARGV[2]) end
+if n <= tonumber(ARGV[1]) then return 1 end
+return 0
+"""
+
+class RedisRateLimiter:
+    """
+    Rate limiter shared across workers through Redis
+    Uses one INCR'd counter per identifier and window, expiring with the window
+    """
+    
+    def __init__(self, redis_client, prefix: str = 'rl'):
+        self.redis = redis_client
+        self.prefix = prefix
+        self._script = redis_client.register_script(_RATE_LIMIT_SCRIPT)
+        
+        # Used while Redis is unreachable so requests are still limited per process
+        self._fallback = RateLimiter()
+    
+    @property
+    def blocked_ips(self) -> Dict[str, float]:
+        """Currently blocked IPs mapped to the seconds left on their block"""
+        
+        try:
+            keys = list(self.redis.scan_iter(match=f"{self.prefix}:blocked:*"))
+            ttls = [self.redis.ttl(key) for key in keys]
+        except Exception as e:
+            logger.warning(f"Redis unavailable, reporting in-process blocks: {e}")
+            return self._fallback.blocked_ips
+        
+        offset = len(self.prefix) + len(':blocked:')
+        return {
+            key.decode()[offset:]: float(ttl)
+            for key, ttl in zip(keys, ttls)
+            if ttl > 0
+        }
+    
+    def is_allowed(self, identifier: str, max_requests: int = 10, window_seconds: int = 60) -> bool:
+        """Check if request is allowed based on rate limits"""
+        
+        # Blocks recorded in-process while Redis was unreachable still apply
+        if self._fallback.is_blocked(identifier):
+            return False
+        
+        try:
+            allowed = bool(self._script(
+                keys=[f"{self.prefix}:{window_seconds}:{identifier}", f"{self.prefix}:blocked:{identifier}"],
+                args=[max_requests, window_seconds]
+            ))
+        except Exception as e:
+            logger.warning(f"Redis unavailable, using in-process rate limiter: {e}")
+            return self._fallback.is_allowed(identifier, max_requests, window_seconds)
+        
+        if not allowed:
+            logger.warning(f"Rate limit exceeded for {identifier}")
+        return allowed
+    
+    def is_blocked(self, ip: str) -> bool:
+        """Check whether an IP address is currently blocked on any worker"""
+        
+        if self._fallback.is_blocked(ip):
+            return True
+        
+        try:
+            return bool(self.redis.exists(f"{self.prefix}:blocked:{ip}"))
+        except Exception as e:
+            logger.warning(f"Redis unavailable, checking in-process blocks only: {e}")
+            return False
+    
+    def block_ip(self, ip: str, duration: int = 3600):
+        """Block an IP address for a duration"""
+        try:
+            self.redis.set(f"{self.prefix}:blocked:{ip}", 1, ex=duration)
+        except Exception as e:
+            logger.warning(f"Redis unavailable, blocking IP in-process only: {e}")
+            self._fallback.block_ip(ip, duration)
+            return
+        logger.warning(f"Blocked IP {ip} for {duration} seconds")
+
+def create_rate_limiter(backend: str, redis_url: Optional[str]):
+    """
+    Create the rate limiter for the configured backend
+    
+    Args:
+        backend: 'redis' to share limits across workers, 'memory' for per-process limits
+        redis_url: Redis connection URL, required for the redis backend
+    
+    Returns:
+        RedisRateLimiter, or RateLimiter when the memory backend is chosen or Redis is unavailable
+    """
+    
+    if backend == 'redis':
+        redis_client = create_redis_client(redis_url)
+        if redis_client is not None:
+            return RedisRateLimiter(redis_client)
+        logger.warning("RATE_LIMIT_BACKEND is redis but Redis is not configured; using in-memory rate limiter")
+    
+    return RateLimiter()
+
+# Global rate limiter instance
+rate_limiter = create_rate_limiter(Config.RATE_LIMIT_BACKEND, Config.REDIS_URL)
+
+def check_rate_limit(route: str, identifier: str, max_requests: int, window_seconds: int) -> tuple:
+    """
+    Check a request against the rate limit
+    
+    With RATE_LIMIT_BACKEND=redis the Redis rate limiter enforces both counts
+    and IP blocks for all workers. Otherwise the shared Redis token bucket is
+    used when configured, falling back to the in-process rate limiter; IPs
+    blocked by the security monitor are rejected before either is consulted.
+    
+    Returns:
+        Tuple of (allowed, retry_after_seconds)
+    """
+    
+    if isinstance(rate_limiter, RedisRateLimiter):
+        return rate_limiter.is_allowed(identifier, max_requests, window_seconds), window_seconds
+    
+    if rate_limiter.is_blocked(identifier):
+        logger.warning(f"Rejected request from blocked IP {identifier}")
+        return False, window_seconds
+    
+    if token_bucket is not None:
+        try:
+            return token_bucket.allow(route, identifier, max_requests, window_seconds)
+        except Exception as e:
+            logger.warning(f"Token bucket unavailable, using in-process rate limiter: {e}")
+    
+    return rate_limiter.is_allowed(identifier, max_requests, window_seconds), window_seconds
+
+def rate_limit(max_requests: int = 10, window_seconds: int = 60):
+    """Rate limiting decorator"""
+    
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Use IP address as identifier
+            identifier = request.remote_addr or 'unknown'
+            
+            allowed, retry_after = check_rate_limit(
+                request.endpoint or f.__name__, identifier, max_requests, window_seconds
+            )
+            if not allowed:
+                response = jsonify({
+                    'success': False,
+                    'error': {
+                        'code': 'RATE_LIMIT_EXCEEDED',
+                        'message': 'Too many requests',
+                        'details': f'Maximum {max_requests} requests per {window_seconds} seconds allowed'
+                    }
+                })
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response, 429
+            
+            return f(*args, **kwargs)
+        
+        return decorated_function
+    return decorator
+
+def sanitize_input(text: str) -> str:
+    """Sanitize user input to prevent XSS and injection attacks"""
+    
+    if not text:
+        return ""
+    
+    # Remove HTML tags and script schemes, repeating in case a removal
+    # joins the pieces of a new one (e.g. "java<b>script:")
+    while any(char in text for char in _SANITIZE_TRIGGERS):
+        text, removed = _SANITIZE_RE.subn('', text)
+        if not removed:
+            break
+    
+    # Limit length
+    if len(text) > 10000:
+        text = text[:10000]
+    
+    return text.strip()
+
+def sanitize_filename(filename: str) -> str:
+    """Sanitize filename for safe storage"""
+    
+    if not filename:
+        return "document.pdf"
+    
+    # Remove path components
+    filename = filename.split('/')[-1].split('\\')[-1]
+    
+    # Replace unsafe characters and remove control characters in one pass
+    filename = filename.translate(_FILENAME_TABLE)
+    
+    # Limit length
+    if len(filename) > 255:
+        name, ext = filename.rsplit('.', 1) if '.' in filename else (filename, '')
+        filename = name[:250] + ('.' + ext if ext else '')
+    
+    return filename
+
+def _substitute_pii(text, detector, substitutions):
+    """Apply PII substitutions in order, after one fused scan rules out text without any"""
+    if not detector.search(text):
+        return text
+    
+    for pattern, tag in substitutions:
+        text = pattern.sub(tag, text)
+    return text
+
+def mask_pii(text: str) -> str:
+    """Basic PII masking for document text"""
+    
+    if not text:
+        return text
+    
+    # Emails, phone numbers, SSNs and credit card numbers
+    if text.isascii():
+        if _PII_RE2 is not None and len(text) >= _RE2_MIN_LENGTH:
+            return _substitute_pii(text, _PII_RE2, _PII_RE2S)
+        return _substitute_pii(text.encode('ascii'), _PII_BYTES_RE, _PII_BYTES_RES).decode('ascii')
+    
+    return _substitute_pii(text, _PII_RE, _PII_RES)
+
+def generate_secure_token() -> str:
+    """Generate a secure random token"""
+    
+    with _random_lock:
+        if len(_random_buffer) < 32:
+            _random_buffer.extend(os.urandom(_RANDOM_BLOCK_SIZE))
+        token_bytes = bytes(_random_buffer[-32:])
+        del _random_buffer[-32:]
+    
+    return base64.urlsafe_b64encode(token_bytes).rstrip(b'=').decode('ascii')
+
+@lru_cache(maxsize=1024)
+def hash_document_id(document_id: str) -> str:
+    """Hash document ID for logging without exposing actual ID"""
+    return hashlib.blake2b(document_id.encode(), digest_size=8).hexdigest()
+
+def validate_request_size(max_size: int = 10485760):  # 10MB default
+    """Validate request content length"""
+    
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            content_length = request.content_length
+            
+            if content_length and content_length > max_size:
+                return jsonify({
+                    'success': False,
+                    'error': {
+                        'code': 'REQUEST_TOO_LARGE',
+                        'message': 'Request too large',
+                        'details': f'Maximum request size is {max_size // (1024*1024)}MB'
+                    }
+                }), 413
+            
+            return f(*args, **kwargs)
+        
+        return decorated_function
+    return decorator
+
+def require_https():
+    """Decorator to require HTTPS in production"""
+    
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Skip HTTPS check in development
+            import os
+            if os.environ.get('FLASK_ENV') == 'development':
+                return f(*args, **kwargs)
+            
+            if not request.is_secure and request.headers.get('X-Forwarded-Proto') != 'https':
+                return jsonify({
+                    'success': False,
+                    'error': {
+                        'code': 'HTTPS_REQUIRED',
+                        'message': 'HTTPS required',
+                        'details': 'This endpoint requires a secure connection'
+                    }
+                }), 400
+            
+            return f(*args, **kwargs)
+        
+        return decorated_function
+    return decorator
+
+def add_security_headers(response):
+    """Add security headers to response"""
+    
+    # Prevent clickjacking
+    response.headers['X-Frame-Options'] = 'DENY'
+    
+    # Prevent MIME type sniffing
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    
+    # XSS protection
+    response.headers['X-XSS-Protection'] = '1; mode=block'
+    
+    # Referrer policy
+    response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
+    
+    # Content Security Policy (basic)
+    response.headers['Content-Security-Policy'] = (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline'; "
+        "style-src 'self' 'unsafe-inline'; "
+        "img-src 'self' data:; "
+        "font-src 'self'; "
+        "connect-src 'self'"
+    )
+    
+    # HSTS (only in production with HTTPS)
+    if request.is_secure or request.headers.get('X-Forwarded-Proto') == 'https':
+        response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+    
+    return response
+
+def _get_event_logger() -> logging.Logger:
+    """Return the queued security event logger, starting its writer thread on first use"""
+    global _log_listener
+    if _log_listener is None:
+        with _log_listener_lock:
+            if _log_listener is None:
+                # Logging is configured by the app after this module is imported,
+                # so the handlers to write through are only resolved now
+                handlers = []
+                current = logger
+                while current:
+                    handlers.extend(current.handlers)
+                    if not current.propagate:
+                        break
+                    current = current.parent
+                
+                listener = QueueListener(_log_queue, *(handlers or [logging.lastResort]), respect_handler_level=True)
+                listener.start()
+                atexit.register(listener.stop)
+                _log_listener = listener
+    return _event_logger
+
+class SecurityMonitor:
+    """Monitor security events"""
+    
+    def __init__(self):
+        self.suspicious_activities: Counter = Counter()
+        self.blocked_attempts: int = 0
+        self._lock = threading.Lock()
+    
+    def log_suspicious_activity(self, ip: str, activity: str):
+        """Log suspicious activity"""
+        
+        key = f"{ip}:{activity}"
+        with self._lock:
+            self.suspicious_activities[key] += 1
+            count = self.suspicious_activities[key]
+            
+            # Forget the oldest keys once the monitor tracks too many
+            while len(self.suspicious_activities) > MAX_TRACKED_CLIENTS:
+                del self.suspicious_activities[next(iter(self.suspicious_activities))]
+            
+            # Auto-block after multiple suspicious activities
+            should_block = count > 5
+            if should_block:
+                self.blocked_attempts += 1
+        
+        _get_event_logger().warning(f"Suspicious activity from {ip}: {activity}")
+        
+        if should_block:
+            rate_limiter.block_ip(ip)
+    
+    def get_security_stats(self) -> Dict:
+        """Get security statistics"""
+        
+        with self._lock:
+            suspicious_activities = len(self.suspicious_activities)
+            blocked_attempts = self.blocked_attempts
+        
+        return {
+            'suspicious_activities': suspicious_activities,
+            'blocked_attempts': blocked_attempts,
+            'blocked_ips': len(rate_limiter.blocked_ips)
+        }
+
+# Global security monitor
+security_monitor = SecurityMonitor()
+
+def detect_malicious_content(text: str) -> bool:
+    """Detect potentially malicious content in text"""
+    
+    if not text:
+        return False
+    
+    if not any(char in text for char in _MALICIOUS_TRIGGERS):
+        return False
+    
+    # Check for script injection attempts. The regex folds case itself, so
+    # short text is never copied; the automaton needs lowercased input and
+    # only pays off on text long enough to be scanned in chunks
+    if _MALICIOUS_AUTOMATON is None or len(text) <= _SCAN_CHUNK_SIZE:
+        return _MALICIOUS_RE.search(text) is not None
+    
+    for start in range(0, len(text), _SCAN_CHUNK_SIZE):
+        chunk = text[max(0, start - _SCAN_OVERLAP):start + _SCAN_CHUNK_SIZE].lower()
+        if next(_MALICIOUS_AUTOMATON.iter(chunk), None) is not None:
+            return True
+    
+    return False
+
+def log_security_event(event_type: str, details: str, ip: str = None):
+    """Log security events for monitoring"""
+    
+    ip = ip or request.remote_addr or 'unknown'
+    
+    _get_event_logger().warning(f"Security Event [{event_type}] from {ip}: {details}")
+    
+    # Track in security monitor
     security_monitor.log_suspicious_activity(ip, event_type)
\ No newline at end of file
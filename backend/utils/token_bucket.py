@@ -0,0 +1,102 @@
+import logging
+from typing import Optional, Tuple
+
+from config import Config
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+logger = logging.getLogger(__name__)
+
+# Atomically refill and take tokens. Uses the Redis server clock so every
+# worker sees the same time. Returns {allowed, seconds_until_next_token}.
+_TOKEN_BUCKET_SCRIPT = """
+local max_tokens = tonumber(ARGV[1])
+local fill_rate = tonumber(ARGV[2])
+local size = tonumber(ARGV[3])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local tokens = tonumber(redis.call('GET', KEYS[1]))
+local last_refill = tonumber(redis.call('GET', KEYS[2]))
+if tokens == nil then tokens = max_tokens end
+if last_refill == nil then last_refill = now end
+
+tokens = math.min(max_tokens, tokens + math.max(0, now - last_refill) * fill_rate)
+
+local allowed = 0
+local wait = 0
+if tokens >= size then
+    tokens = tokens - size
+    allowed = 1
+else
+    wait = (size - tokens) / fill_rate
+end
+
+local ttl = math.ceil(max_tokens / fill_rate) + 1
+redis.call('SET', KEYS[1], tostring(tokens), 'EX', ttl)
+redis.call('SET', KEYS[2], tostring(now), 'EX', ttl)
+return {allowed, tostring(wait)}
+"""
+
+class TokenBucket:
+    """
+    Token bucket rate limiter shared across workers through Redis
+    Each route/client pair holds up to max_tokens, refilled evenly over fill_interval seconds
+    """
+
+    def __init__(self, redis_client, prefix: str = 'tb'):
+        self.redis = redis_client
+        self.prefix = prefix
+        self._script = redis_client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def allow(self, route: str, client: str, max_tokens: int, fill_interval: float,
+              size: int = 1) -> Tuple[bool, float]:
+        """
+        Try to take tokens from a bucket
+
+        Args:
+            route: Route name the bucket belongs to
+            client: Client identifier (e.g. IP address)
+            max_tokens: Bucket capacity
+            fill_interval: Seconds to refill the bucket from empty
+            size: Number of tokens to take
+
+        Returns:
+            Tuple of (allowed, seconds until enough tokens are available)
+        """
+
+        key = f"{self.prefix}:{route}:{client}"
+        allowed, wait = self._script(
+            keys=[f"{key}:tokens", f"{key}:last_refill"],
+            args=[max_tokens, max_tokens / fill_interval, size]
+        )
+        return bool(int(allowed)), float(wait)
+
+def create_redis_client(redis_url: Optional[str]):
+    """Create a Redis client, or None when Redis is not configured"""
+
+    if not redis_url:
+        return None
+
+    if not HAS_REDIS:
+        logger.warning("REDIS_URL is set but the redis package is not installed")
+        return None
+
+    return redis.Redis.from_url(redis_url)
+
+def create_token_bucket(redis_url: Optional[str]) -> Optional[TokenBucket]:
+    """Create a Redis-backed token bucket, or None when Redis is not configured"""
+
+    redis_client = create_redis_client(redis_url)
+    if redis_client is None:
+        return None
+
+    return TokenBucket(redis_client)
+
+# Global token bucket instance (None when rate limits are tracked per process)
+token_bucket = create_token_bucket(Config.REDIS_URL)
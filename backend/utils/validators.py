@@ -1,115 +1,183 @@
-import os
-from werkzeug.datastructures import FileStorage
-from typing import Tuple, Optional
-
-try:
-    import magic
-    HAS_MAGIC = True
-except ImportError:
-    HAS_MAGIC = False
-
-def validate_pdf_file(file: FileStorage, max_size: int = 10485760) -> Tuple[bool, Optional[str]]:
-    """
-    Validate uploaded PDF file
-    
-    Args:
-        file: Uploaded file object
-        max_size: Maximum file size in bytes (default 10MB)
-    
-    Returns:
-        Tuple of (is_valid, error_message)
-    """
-    
-    # Check if file exists
-    if not file or not file.filename:
-        return False, "No file provided"
-    
-    # Check file extension
-    if not file.filename.lower().endswith('.pdf'):
-        return False, "Only PDF files are supported"
-    
-    # Check file size by seeking to end
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)  # Reset to beginning
-    
-    if file_size > max_size:
-        max_mb = max_size // (1024 * 1024)
-        return False, f"File size exceeds {max_mb}MB limit"
-    
-    if file_size == 0:
-        return False, "File is empty"
-    
-    # Try to detect file type using python-magic if available
-    if HAS_MAGIC:
-        try:
-            file_content = file.read(1024)  # Read first 1KB
-            file.seek(0)  # Reset to beginning
-            
-            mime_type = magic.from_buffer(file_content, mime=True)
-            if mime_type != 'application/pdf':
-                return False, "File is not a valid PDF"
-        except Exception:
-            # If magic fails, continue without MIME check
-            pass
-    
-    return True, None
-
-def validate_question(question: str, max_length: int = 1000) -> Tuple[bool, Optional[str]]:
-    """
-    Validate user question
-    
-    Args:
-        question: User's question string
-        max_length: Maximum question length
-    
-    Returns:
-        Tuple of (is_valid, error_message)
-    """
-    
-    if not question or not question.strip():
-        return False, "Question cannot be empty"
-    
-    question = question.strip()
-    
-    if len(question) > max_length:
-        return False, f"Question exceeds {max_length} character limit"
-    
-    # Check for potentially malicious content
-    suspicious_patterns = ['<script', 'javascript:', 'data:', 'vbscript:']
-    question_lower = question.lower()
-    
-    for pattern in suspicious_patterns:
-        if pattern in question_lower:
-            return False, "Question contains invalid content"
-    
-    return True, None
-
-def sanitize_filename(filename: str) -> str:
-    """
-    Sanitize filename for safe storage
-    
-    Args:
-        filename: Original filename
-    
-    Returns:
-        Sanitized filename
-    """
-    
-    if not filename:
-        return "document.pdf"
-    
-    # Remove path components
-    filename = os.path.basename(filename)
-    
-    # Replace unsafe characters
-    unsafe_chars = '<>:"/\\|?*'
-    for char in unsafe_chars:
-        filename = filename.replace(char, '_')
-    
-    # Limit length
-    if len(filename) > 255:
-        name, ext = os.path.splitext(filename)
-        filename = name[:250] + ext
-    
+import io
+import os
+import re
+import tempfile
+from werkzeug.datastructures import FileStorage
+from typing import Tuple, Optional
+
+# MIME sniffer bound once at import: libmagic when available, otherwise an
+# optimistic pass-through so validation relies on the other checks
+try:
+    import magic
+    
+    def _sniff_mime(header: bytes) -> str:
+        return magic.from_buffer(header, mime=True)
+except ImportError:
+    def _sniff_mime(header: bytes) -> str:
+        return 'application/pdf'
+
+# Potentially malicious content in questions, matched in a single pass
+SUSPICIOUS_CONTENT_RE = re.compile(r'<script|javascript:|data:|vbscript:', re.IGNORECASE)
+
+# Characters unsafe in filenames, each replaced with an underscore
+_UNSAFE_FILENAME_TABLE = str.maketrans('<>:"/\\|?*', '_' * 9)
+
+def _in_memory_buffer(stream) -> Optional[io.BytesIO]:
+    """
+    Return the BytesIO holding an in-memory upload, or None if it lives on disk
+    
+    Werkzeug spools uploads in a SpooledTemporaryFile, which stays in memory
+    until it grows past its limit. Calling fileno() on it forces a rollover
+    to disk, so in-memory spools are read through their buffer instead.
+    """
+    
+    if isinstance(stream, tempfile.SpooledTemporaryFile) and not stream._rolled:
+        stream = stream._file
+    return stream if isinstance(stream, io.BytesIO) else None
+
+def get_upload_size(file: FileStorage) -> int:
+    """Return the size of an upload in bytes, without moving its read position when possible"""
+    
+    stream = file.stream
+    
+    # Small uploads are held in memory
+    buffer = _in_memory_buffer(stream)
+    if buffer is not None:
+        return buffer.getbuffer().nbytes
+    
+    # Large uploads are spooled to a temporary file: one fstat call
+    try:
+        stream.flush()
+        return os.fstat(stream.fileno()).st_size
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    
+    # Unknown stream type: fall back to seeking to the end
+    file.seek(0, os.SEEK_END)
+    file_size = file.tell()
+    file.seek(0)  # Reset to beginning
+    return file_size
+
+def read_upload_header(file: FileStorage, size: int = 1024) -> bytes:
+    """Return the first bytes of an upload without moving its read position when possible"""
+    
+    stream = file.stream
+    
+    # In-memory uploads: slice the buffer directly
+    buffer = _in_memory_buffer(stream)
+    if buffer is not None:
+        with buffer.getbuffer() as view:
+            return bytes(view[:size])
+    
+    # Uploads spooled to disk: one positional read, no seeks
+    try:
+        stream.flush()
+        return os.pread(stream.fileno(), size, 0)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        pass
+    
+    # Unknown stream type: fall back to reading and rewinding
+    file.seek(0)
+    header = file.read(size)
+    file.seek(0)  # Reset to beginning
+    return header
+
+def validate_pdf_file(file: FileStorage, max_size: int = 10485760) -> Tuple[bool, Optional[str]]:
+    """
+    Validate uploaded PDF file
+    
+    Args:
+        file: Uploaded file object
+        max_size: Maximum file size in bytes (default 10MB)
+    
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    
+    # Check if file exists
+    if not file or not file.filename:
+        return False, "No file provided"
+    
+    # Check file extension
+    if not file.filename.lower().endswith('.pdf'):
+        return False, "Only PDF files are supported"
+    
+    # Check file size
+    file_size = get_upload_size(file)
+    
+    if file_size > max_size:
+        max_mb = max_size // (1024 * 1024)
+        return False, f"File size exceeds {max_mb}MB limit"
+    
+    if file_size == 0:
+        return False, "File is empty"
+    
+    # Detect the file type from its first 1KB
+    try:
+        file_content = read_upload_header(file)
+        
+        # A PDF signature at the very start is conclusive; the MIME sniffer
+        # is only consulted for less obvious files
+        if file_content.startswith(b'%PDF-'):
+            return True, None
+        
+        if _sniff_mime(file_content) != 'application/pdf':
+            return False, "File is not a valid PDF"
+    except Exception:
+        # If sniffing fails, continue without MIME check
+        pass
+    
+    return True, None
+
+def validate_question(question: str, max_length: int = 1000) -> Tuple[bool, Optional[str]]:
+    """
+    Validate user question
+    
+    Args:
+        question: User's question string
+        max_length: Maximum question length
+    
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    
+    if not question or not question.strip():
+        return False, "Question cannot be empty"
+    
+    question = question.strip()
+    
+    if len(question) > max_length:
+        return False, f"Question exceeds {max_length} character limit"
+    
+    # Check for potentially malicious content
+    if SUSPICIOUS_CONTENT_RE.search(question):
+        return False, "Question contains invalid content"
+    
+    return True, None
+
+def sanitize_filename(filename: str) -> str:
+    """
+    Sanitize filename for safe storage
+    
+    Args:
+        filename: Original filename
+    
+    Returns:
+        Sanitized filename
+    """
+    
+    if not filename:
+        return "document.pdf"
+    
+    # Remove path components
+    filename = os.path.basename(filename)
+    
+    # Replace unsafe characters
+    filename = filename.translate(_UNSAFE_FILENAME_TABLE)
+    
+    # Limit length
+    if len(filename) > 255:
+        name, ext = os.path.splitext(filename)
+        filename = name[:250] + ext
+    
     return filename
\ No newline at end of file
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Retry with exponential backoff for the API test scripts
+Gemini and Vertex AI rate-limit aggressively, so a transient error is
+retried a few times instead of failing the whole run
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limits and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+def is_transient_google_error(e):
+    """True for rate limits and transient server errors raised by the Google SDKs"""
+    # Imported here so scripts that only make plain HTTP calls don't need the SDK
+    from google.api_core import exceptions as google_exceptions
+    return isinstance(e, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.InternalServerError,
+        google_exceptions.BadGateway,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded
+    ))
+
+def is_transient_http_error(e):
+    """True for httpx transport failures and responses with a retryable status"""
+    import httpx
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code in RETRY_STATUSES
+    return isinstance(e, httpx.TransportError)
+
+def _delays(max_attempts, delay, max_delay):
+    """Seconds to wait before each retry: doubling from delay, capped at max_delay"""
+    return [min(max_delay, delay * (2 ** attempt)) for attempt in range(max_attempts - 1)]
+
+def retry(fn, should_retry, max_attempts=3, delay=0.5, max_delay=4.0):
+    """
+    Call fn(), retrying while it raises an error should_retry accepts
+
+    Args:
+        fn: Callable making the API call
+        should_retry: Predicate deciding whether an exception is transient
+        max_attempts: Total number of attempts
+        delay: Seconds before the first retry
+        max_delay: Upper bound on the wait between attempts
+
+    Returns:
+        Result of the first successful call; the last error propagates
+    """
+    for wait in _delays(max_attempts, delay, max_delay):
+        try:
+            return fn()
+        except Exception as e:
+            if not should_retry(e):
+                raise
+            logger.warning(f"⏳ Transient error, retrying in {wait:.1f}s: {str(e)}")
+        time.sleep(wait)
+    return fn()
+
+async def retry_async(fn, should_retry, max_attempts=3, delay=0.5, max_delay=4.0):
+    """Like retry(), for a coroutine function; waits without blocking the event loop"""
+    for wait in _delays(max_attempts, delay, max_delay):
+        try:
+            return await fn()
+        except Exception as e:
+            if not should_retry(e):
+                raise
+            logger.warning(f"⏳ Transient error, retrying in {wait:.1f}s: {str(e)}")
+        await asyncio.sleep(wait)
+    return await fn()
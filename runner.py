@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Run the Gemini, Vertex AI and WhatsApp test scripts together
+All tests share one process and event loop, so startup and environment
+loading are paid once and the independent network checks overlap
+"""
+
+import asyncio
+import logging
+import sys
+
+from test_rest_gemini import test_rest_gemini_async
+from test_simple_gemini import test_simple_gemini_async
+from test_vertex import test_vertex_ai_async
+from test_whatsapp import run_tests as test_whatsapp_async
+
+logger = logging.getLogger(__name__)
+
+async def main(use_cache=True):
+    """Run all tests concurrently and return their results by name"""
+    names = ('Gemini REST API', 'Simple Gemini API', 'Vertex AI', 'WhatsApp integration')
+    results = await asyncio.gather(
+        test_rest_gemini_async(use_cache),
+        test_simple_gemini_async(use_cache),
+        test_vertex_ai_async(use_cache),
+        test_whatsapp_async(),
+        return_exceptions=True
+    )
+    return dict(zip(names, results))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+
+    logger.info("🧪 Running Legal EASE API tests...")
+    logger.info("=" * 50)
+
+    # --no-cache calls the APIs even when saved responses exist
+    results = asyncio.run(main(use_cache='--no-cache' not in sys.argv))
+
+    logger.info("\n" + "=" * 50)
+    logger.info("📋 Test Summary:")
+    for name, result in results.items():
+        if isinstance(result, Exception):
+            logger.error(f"❌ {name}: {str(result)}")
+        elif result is False:
+            logger.error(f"❌ {name}: failed")
+        else:
+            # The WhatsApp checks report their own results and return None
+            logger.info(f"✅ {name}: {'passed' if result else 'see output above'}")
+
+    sys.exit(1 if any(result is False or isinstance(result, Exception) for result in results.values()) else 0)
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Shared environment for the Gemini/Vertex test scripts
+backend/.env is read once per process, however many scripts are imported
+"""
+
+import os
+from functools import lru_cache
+from dotenv import load_dotenv
+
+@lru_cache(maxsize=1)
+def env():
+    """Load backend/.env on first call and return the settings the tests use"""
+    load_dotenv('backend/.env')
+    return {
+        'GEMINI_API_KEY': os.getenv('GEMINI_API_KEY'),
+        'GOOGLE_CLOUD_PROJECT': os.getenv('GOOGLE_CLOUD_PROJECT'),
+        'VERTEX_AI_LOCATION': os.getenv('VERTEX_AI_LOCATION', 'us-central1')
+    }
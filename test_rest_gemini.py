@@ -1,93 +1,254 @@
-#!/usr/bin/env python3
-"""
-Test Gemini API using direct REST calls
-"""
-
-import requests
-import json
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv('backend/.env')
-
-def test_rest_gemini():
-    """Test Gemini API using REST calls"""
-    api_key = os.getenv('GEMINI_API_KEY')
-    
-    print(f"🔑 API Key: {api_key[:10]}...{api_key[-10:] if api_key else 'None'}")
-    
-    if not api_key:
-        print("❌ No API key found!")
-        return False
-    
-    try:
-        # First, list available models
-        print("\n📋 Checking available models...")
-        list_url = f"https://generativelanguage.googleapis.com/v1beta/models?key={api_key}"
-        list_response = requests.get(list_url, timeout=30)
-        
-        if list_response.status_code == 200:
-            models = list_response.json()
-            print("Available models:")
-            for model in models.get('models', []):
-                if 'generateContent' in model.get('supportedGenerationMethods', []):
-                    print(f"  - {model['name']}")
-        
-        # Try with a working model
-        models_to_try = [
-            "gemini-2.0-flash-exp",
-            "gemini-2.0-flash",
-            "gemini-1.5-flash",
-            "gemini-1.5-pro", 
-            "gemini-pro"
-        ]
-        
-        for model_name in models_to_try:
-            print(f"\n🔄 Trying model: {model_name}")
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{model_name}:generateContent?key={api_key}"
-            
-            headers = {
-                'Content-Type': 'application/json',
-            }
-            
-            data = {
-                "contents": [{
-                    "parts": [{
-                        "text": "Respond with exactly: 'REST API is working correctly'"
-                    }]
-                }]
-            }
-            
-            response = requests.post(url, headers=headers, json=data, timeout=30)
-            
-            print(f"📡 Status Code: {response.status_code}")
-            
-            if response.status_code == 200:
-                result = response.json()
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    text = result['candidates'][0]['content']['parts'][0]['text']
-                    print(f"✅ API Response: {text}")
-                    print(f"✅ Working model: {model_name}")
-                    return True
-                else:
-                    print(f"❌ No candidates in response: {result}")
-            else:
-                print(f"❌ API Error: {response.status_code} - {response.text[:200]}...")
-        
-        return False
-            
-    except Exception as e:
-        print(f"❌ Exception: {str(e)}")
-        return False
-
-if __name__ == "__main__":
-    print("🧪 Testing Gemini REST API...")
-    print("=" * 50)
-    
-    success = test_rest_gemini()
-    
-    if success:
-        print("\n🎉 Gemini REST API is working!")
-    else:
-        print("\n⚠️ Gemini REST API test failed.")
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+Test Gemini API using direct REST calls
+"""
+
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import json
+import os
+import sys
+import time
+import hashlib
+import asyncio
+import httpx
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+try:
+    import h2
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+from api_cache import get_cached, store
+from test_config import env
+from retry_utils import RETRY_STATUSES, is_transient_http_error, retry_async
+
+logger = logging.getLogger(__name__)
+
+# API endpoints; the key is sent as a query parameter, never baked into URLs
+MODELS_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+GENERATE_URL = MODELS_URL + "/{model}:generateContent"
+
+# The model list rarely changes, so it is cached on disk between runs
+MODELS_CACHE_DIR = '.gemini_cache'
+MODELS_CACHE_TTL = 3600  # seconds
+
+PROBE_PROMPT = {
+    "contents": [{
+        "parts": [{
+            "text": "Respond with exactly: 'REST API is working correctly'"
+        }]
+    }]
+}
+# Encoded once and sent as-is to the model that answers
+PROBE_PAYLOAD = json.dumps(PROBE_PROMPT).encode('utf-8')
+
+# Minimal one-token request used to find an available model cheaply
+AVAILABILITY_PAYLOAD = json.dumps({
+    "contents": [{"parts": [{"text": "."}]}],
+    "generationConfig": {"maxOutputTokens": 1}
+}).encode('utf-8')
+
+# Keep-alive session for the model listing; probes go through httpx
+session = requests.Session()
+session.headers.update({
+    'Content-Type': 'application/json',
+    'Connection': 'keep-alive'
+})
+session.mount('https://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=1,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
+
+def _generate_content_models(response):
+    """Yield names of models supporting generateContent from a streamed list response"""
+    if HAS_IJSON:
+        # Parse the listing as it downloads instead of holding all model metadata
+        response.raw.decode_content = True
+        models = ijson.items(response.raw, 'models.item')
+    else:
+        models = response.json().get('models', [])
+    
+    for model in models:
+        if 'generateContent' in model.get('supportedGenerationMethods', []):
+            yield model['name']
+
+def list_models(api_key, use_cache=True):
+    """List models supporting generateContent, from the on-disk cache when it is fresh"""
+    key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    cache_file = os.path.join(MODELS_CACHE_DIR, f"model-names-{key_hash}.json")
+    
+    if use_cache:
+        try:
+            if time.time() - os.path.getmtime(cache_file) < MODELS_CACHE_TTL:
+                with open(cache_file, 'r') as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass
+    elif os.path.exists(cache_file):
+        os.remove(cache_file)
+    
+    with session.get(MODELS_URL, params={'key': api_key}, stream=True, timeout=30) as list_response:
+        if list_response.status_code != 200:
+            return None
+        models = list(_generate_content_models(list_response))
+    
+    os.makedirs(MODELS_CACHE_DIR, exist_ok=True)
+    with open(cache_file, 'w') as f:
+        json.dump(models, f)
+    return models
+
+async def probe_models(api_key, models_to_try):
+    """
+    Find a working model with cheap concurrent probes, then send it the real prompt
+    
+    Returns:
+        (model_name, response_text) from the first model to answer, or None
+    """
+    # With h2 installed all probes are multiplexed over a single connection
+    async with httpx.AsyncClient(
+        http2=HAS_H2, timeout=30, headers={'Content-Type': 'application/json'}, params={'key': api_key}
+    ) as client:
+        # Each model's URL is built once and reused by its retries and the final prompt
+        urls = {model_name: GENERATE_URL.format(model=model_name) for model_name in models_to_try}
+        
+        async def post(model_name, payload):
+            url = urls[model_name]
+            
+            async def send():
+                response = await client.post(url, content=payload)
+                if response.status_code in RETRY_STATUSES:
+                    response.raise_for_status()
+                return response
+            
+            try:
+                return model_name, await retry_async(send, is_transient_http_error)
+            except httpx.HTTPError as e:
+                logger.error(f"❌ {model_name}: {str(e)}")
+                return model_name, None
+        
+        tasks = []
+        for model_name in models_to_try:
+            logger.info(f"\n🔄 Trying model: {model_name}")
+            tasks.append(asyncio.ensure_future(post(model_name, AVAILABILITY_PAYLOAD)))
+        
+        working_model = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                model_name, response = await next_done
+                if response is None:
+                    continue
+                
+                logger.info(f"📡 {model_name} Status Code: {response.status_code}")
+                
+                if response.status_code == 200:
+                    working_model = model_name
+                    break
+                logger.error(f"❌ API Error: {response.status_code} - {response.text[:200]}...")
+        finally:
+            # Don't wait on the probes still in flight once a model has answered
+            for task in tasks:
+                task.cancel()
+        
+        if working_model is None:
+            return None
+        
+        # Only the model that answered gets the full prompt
+        model_name, response = await post(working_model, PROBE_PAYLOAD)
+        if response is None:
+            return None
+        if response.status_code != 200:
+            logger.error(f"❌ API Error: {response.status_code} - {response.text[:200]}...")
+            return None
+        
+        result = response.json()
+        if 'candidates' in result and len(result['candidates']) > 0:
+            return model_name, result['candidates'][0]['content']['parts'][0]['text']
+        
+        logger.error(f"❌ No candidates in response: {result}")
+        return None
+
+def test_rest_gemini(use_cache=True):
+    """Test Gemini API using REST calls"""
+    return asyncio.run(test_rest_gemini_async(use_cache))
+
+async def test_rest_gemini_async(use_cache=True):
+    """Test Gemini API using REST calls, on the caller's event loop"""
+    api_key = env()['GEMINI_API_KEY']
+    
+    logger.info(f"🔑 API Key: {api_key[:10]}...{api_key[-10:] if api_key else 'None'}")
+    
+    if not api_key:
+        logger.error("❌ No API key found!")
+        return False
+    
+    try:
+        # First, list available models
+        logger.info("\n📋 Checking available models...")
+        models = await asyncio.to_thread(list_models, api_key, use_cache)
+        
+        if models is not None:
+            logger.info("Available models:")
+            for model_name in models:
+                logger.info(f"  - {model_name}")
+        
+        # Try with a working model
+        models_to_try = [
+            "gemini-2.0-flash-exp",
+            "gemini-2.0-flash",
+            "gemini-1.5-flash",
+            "gemini-1.5-pro", 
+            "gemini-pro"
+        ]
+        
+        # A saved answer from an earlier run makes the probes unnecessary
+        prompt_key = json.dumps(PROBE_PROMPT['contents'], sort_keys=True)
+        if use_cache:
+            for model_name in models_to_try:
+                text = get_cached(api_key, model_name, prompt_key)
+                if text is not None:
+                    logger.info(f"💾 Using cached response for {model_name}")
+                    logger.info(f"✅ API Response: {text}")
+                    logger.info(f"✅ Working model: {model_name}")
+                    return True
+        
+        # Probe all models at once; the first one to answer ends the search
+        working = await probe_models(api_key, models_to_try)
+        if working is not None:
+            model_name, text = working
+            store(api_key, model_name, prompt_key, text)
+            logger.info(f"✅ API Response: {text}")
+            logger.info(f"✅ Working model: {model_name}")
+            return True
+        
+        return False
+            
+    except Exception as e:
+        logger.error(f"❌ Exception: {str(e)}")
+        return False
+
+if __name__ == "__main__":
+    # Messages only, to stdout; each record is written whole, so lines from
+    # concurrent probes never interleave mid-line
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    
+    logger.info("🧪 Testing Gemini REST API...")
+    logger.info("=" * 50)
+    
+    # --no-cache refetches the model list and probes the API even when a
+    # saved response exists
+    success = test_rest_gemini(use_cache='--no-cache' not in sys.argv)
+    
+    if success:
+        logger.info("\n🎉 Gemini REST API is working!")
+    else:
+        logger.warning("\n⚠️ Gemini REST API test failed.")
\ No newline at end of file